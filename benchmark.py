@@ -0,0 +1,988 @@
+"""Offline benchmarks for bot.py. Correctness checks live in tests/
+(`python -m pytest`); these only measure.
+
+Usage:
+    python benchmark.py extraction [--corpus DIR | --synthetic [--entries N]] [--repeat R]
+    python benchmark.py slots [--items N] [--days D] [--seed S]
+    python benchmark.py startup [--repeat R]
+    python benchmark.py near-dups [--vacancies N] [--seed S]
+    python benchmark.py extract-pool [--entries N] [--processes 1,2,4]
+    python benchmark.py tweets [--items N] [--seed S]
+    python benchmark.py record [--out DIR]
+    python benchmark.py suite [--fixtures DIR | --synthetic] [--sizes 10,...,100000] [--queue-sizes 10,...,10000]
+                              [--repeat R] [--save FILE] [--compare BASELINE] [--tolerance PCT]
+    python benchmark.py journal [--runs N] [--seed S]
+    python benchmark.py fetch [--slowest SECONDS]
+
+`extraction` times extract_smart_details() against the original
+BeautifulSoup implementation (needs `pip install beautifulsoup4`) and checks
+that both return identical results for every entry. Entry bodies are read
+from the saved feed files (*.xml / *.rss) in --corpus, by default the
+committed benchmarks/fixtures; --synthetic generates --entries bodies
+shaped like the RemoteOK / HotNigerianJobs / MyJobMag ones instead.
+
+`slots` times filling a synthetic queue through SlotAllocator, then
+BotState.next_due_post lookups and draining every due slot through
+BotState.claim_slot.
+
+`startup` uses `python -X importtime` to compare importing bot.py (heavy
+dependencies deferred) with importing it plus tweepy/requests/feedparser the
+way every run used to, then times a complete off-hour `python bot.py`
+that exits through the fast path.
+
+`near-dups` builds a synthetic cross-posted corpus (each vacancy appears
+once or more, reworded the way different job boards title it) and reports
+the NearDupIndex's precision/recall against the ground truth, plus lookup
+throughput compared with a linear scan over the same signatures.
+
+`extract-pool` runs bot.extract_batch over a synthetic refill of thousands
+of entries with different process counts, checks every run returns the same
+opportunities in the same order, and reports how it scales with cores.
+
+`tweets` times bot.format_rich_tweet over a synthetic corpus with overlong
+titles, non-Latin text, emoji, long URLs and emails, and reports the
+weighted lengths and how many tweets had to be trimmed.
+
+`record` saves each registered source's current feed to DIR/<name>.xml
+(default benchmarks/fixtures; needs network access once). `suite` replays
+those recorded payloads (the committed benchmarks/fixtures unless
+--fixtures says otherwise, or a generated corpus with --synthetic)
+through a local HTTP stub and a fake tweepy client. It never touches the
+network or the X API. It runs refill_queue, extract_smart_details and a full main() whose queue is low
+enough to refill (fetch, extract, queue, post) at each corpus size, and
+cleanup_old_data and main() over an existing queue at each queue size.
+For each it reports throughput, p50/p95/p99 latency and peak traced
+memory (the extraction worker processes aren't traced). Results are
+saved as JSON. --compare flags (and exits 1 on) any case whose p50 is more than
+--tolerance percent slower than the baseline file.
+
+`journal` drives the same simulated cron runs (refills, expiry, posting
+through a fake client, day rollovers) against one account on the `json`
+backend and one on the `journal` backend, reloading both from disk before
+every run, and reports the bytes each backend writes per run.
+
+`fetch` times fetch_feeds against local feeds that answer after a set
+delay: one feed per host (wall time vs. fetching them one after another),
+the same plus a feed slower than the deadline, and many feeds on one host
+(and how many requests were in flight at once).
+"""
+import argparse
+import contextlib
+import copy
+import glob
+import http.server
+import io
+import platform
+import threading
+import tracemalloc
+from xml.sax.saxutils import escape
+from datetime import datetime, timedelta, timezone
+import os
+import random
+import json
+import re
+import subprocess
+import sys
+import tempfile
+import time
+
+import bot
+
+# Recorded feeds (one <source name>.xml per source) that `suite` and
+# `extraction` replay by default; refresh them with `record`
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks', 'fixtures')
+
+# ============================================================================
+# CORPUS
+# ============================================================================
+
+_SNIPPETS = [
+    "<p><strong>{company}</strong> is hiring a {role} in {city}.</p>",
+    "<p>Salary: {salary}</p>",
+    "<ul><li>Health insurance and dental</li><li>Paid time off</li><li>Flexible hours</li></ul>",
+    "<p>We offer stock options, visa sponsorship and relocation support.</p>",
+    "<p>This is a remote position — work from home anywhere in Africa.</p>",
+    "<p>Interested candidates should send their CV to <a href=\"mailto:{email}\">{email}</a></p>",
+    "<p>For enquiries contact info@{domain} or support@{domain}.</p>",
+    "<p>Experience with web3, bitcoin or crypto payments is a plus &amp; async culture.</p>",
+    "<p>Requirements:</p><ol><li>B.Sc in any discipline</li><li>2 - 5 years experience</li></ol>",
+    "<div class=\"apply\"><script>trackApply();</script>Apply before the deadline.</div>",
+    "<p>Method of Application&nbsp;&raquo; click the link below.</p><!-- ad slot -->",
+]
+_COMPANIES = ["Alpaca", "BitMEX", "Gladiator Systems", "Bosak Microfinance Bank", "Visa Inc", "DevAfrique"]
+_ROLES = ["Senior Software Engineer", "Sales Manager", "Quality Control Officer", "Business Officer"]
+_CITIES = ["Lagos", "Abuja", "Port Harcourt", "Ikorodu", "Remote"]
+_SALARIES = ["$120k - $160k/yr", "₦350,000 - ₦500,000/month", "N150,000", "$4,000/mo", "Competitive"]
+
+
+def synthetic_bodies(n, seed=1):
+    rng = random.Random(seed)
+    bodies = []
+    for _ in range(n):
+        domain = rng.choice(["acme.com", "jobs.ng", "company.io"])
+        fields = {
+            'company': rng.choice(_COMPANIES), 'role': rng.choice(_ROLES), 'city': rng.choice(_CITIES),
+            'salary': rng.choice(_SALARIES), 'email': f"careers@{domain}", 'domain': domain,
+        }
+        parts = rng.sample(_SNIPPETS, rng.randint(3, len(_SNIPPETS)))
+        bodies.append("\n".join(p.format(**fields) for p in parts))
+    return bodies
+
+
+def corpus_bodies(directory):
+    """Entry bodies from saved feed payloads, the way fetch_rss_jobs reads them"""
+    import feedparser
+    bodies = []
+    for path in sorted(glob.glob(os.path.join(directory, '*.xml')) + glob.glob(os.path.join(directory, '*.rss'))):
+        with open(path, 'rb') as f:
+            feed = feedparser.parse(f.read())
+        for entry in feed.entries:
+            if hasattr(entry, 'content'): bodies.append(entry.content[0].value)
+            elif hasattr(entry, 'summary'): bodies.append(entry.summary)
+            elif hasattr(entry, 'description'): bodies.append(entry.description)
+    return bodies
+
+# ============================================================================
+# REFERENCE IMPLEMENTATIONS
+# ============================================================================
+
+def legacy_extract_smart_details(html_text):
+    """extract_smart_details as it was before the precompiled engine"""
+    from bs4 import BeautifulSoup
+    soup = BeautifulSoup(html_text, 'html.parser')
+    text = soup.get_text(separator=' ', strip=True)
+
+    details = {'salary': None, 'email': None, 'benefits': []}
+
+    salary_patterns = [r'(\$|₦|N)\s?[\d,kK]+(\s*(-|—|to)\s*(\$|₦|N)\s?[\d,kK]+)?\s*(/yr|/mo|/year|/month|annually)?']
+    for pattern in salary_patterns:
+        match = re.search(pattern, text, re.IGNORECASE)
+        if match:
+            s = match.group(0).strip().replace('—', '-')
+            if len(s) > 3: details['salary'] = s; break
+
+    emails = re.findall(r'[\w\.-]+@[\w\.-]+\.\w+', text)
+    ignore = ['noreply', 'support', 'help', 'info', 'example', 'wixpress']
+    for email in emails:
+        if not any(x in email.lower() for x in ignore):
+            details['email'] = email; break
+
+    found_benefits = []
+    text_lower = text.lower()
+    for label, patterns in bot.BENEFIT_KEYWORDS.items():
+        if any(p in text_lower for p in patterns):
+            found_benefits.append(label)
+            if len(found_benefits) >= 3: break
+
+    details['benefits'] = found_benefits
+    return details
+
+# ============================================================================
+# BENCHMARKS
+# ============================================================================
+
+@contextlib.contextmanager
+def scratch_dir():
+    """Run with an empty temp dir as cwd so bot state files never touch the repo"""
+    previous = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            yield tmp
+        finally:
+            os.chdir(previous)
+
+
+def _time(fn, bodies, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for body in bodies:
+            fn(body)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def bench_extraction(args):
+    bodies = synthetic_bodies(args.entries) if args.synthetic else corpus_bodies(args.corpus)
+    print(f"📚 Corpus: {len(bodies)} entry bodies ({'synthetic' if args.synthetic else 'recorded'})")
+    if not bodies:
+        print("❌ No entry bodies found.")
+        return
+
+    new_time = _time(bot.extract_smart_details, bodies, args.repeat)
+    print(f"⚡ extract_smart_details: {new_time * 1000:.1f} ms "
+          f"({len(bodies) / new_time:,.0f} entries/s)")
+
+    try:
+        import bs4  # noqa: F401
+    except ImportError:
+        print("ℹ️  beautifulsoup4 not installed — skipping the legacy comparison")
+        return
+
+    mismatches = [b for b in bodies if bot.extract_smart_details(b) != legacy_extract_smart_details(b)]
+    if mismatches:
+        print(f"❌ {len(mismatches)} bodies differ from the legacy output, e.g.:\n{mismatches[0][:300]}")
+    else:
+        print("✅ Output identical to the legacy implementation for every body")
+
+    old_time = _time(legacy_extract_smart_details, bodies, args.repeat)
+    print(f"🐢 legacy (BeautifulSoup): {old_time * 1000:.1f} ms "
+          f"({len(bodies) / old_time:,.0f} entries/s)")
+    print(f"📈 Speedup: {old_time / new_time:.1f}x")
+
+
+def bench_slots(args):
+    rng = random.Random(args.seed)
+    now = datetime(2026, 1, 1, tzinfo=timezone.utc) + timedelta(minutes=rng.randrange(24 * 60))
+    hours = sorted(bot.ALLOWED_HOURS_UTC)
+
+    # Pre-existing queue: random occupied slots over the horizon, some posted
+    existing = []
+    for _ in range(args.items // 2):
+        slot = (now + timedelta(days=rng.randrange(args.days))).replace(
+            hour=rng.choice(hours), minute=0, second=0, microsecond=0)
+        existing.append({'url': f'https://example.com/{len(existing)}', 'posted': rng.random() < 0.2,
+                         'scheduled_time': slot.isoformat(), 'score': round(rng.uniform(0, 100), 2)})
+
+    started = time.perf_counter()
+    allocator = bot.SlotAllocator(existing, now=now, horizon_days=args.days)
+    assigned = [allocator.assign(now=now) for _ in range(args.items)]
+    elapsed = time.perf_counter() - started
+    print(f"🗓️  Assigned {len(assigned):,} slots over a {args.days}-day horizon in {elapsed * 1000:.1f} ms "
+          f"({len(assigned) / elapsed:,.0f} slots/s)")
+
+    with scratch_dir():
+        state = bot.BotState()
+        state.set_schedule(existing)
+        probes = [now + timedelta(days=rng.uniform(-1, args.days)) for _ in range(args.items)]
+        started = time.perf_counter()
+        for probe in probes:
+            state.next_due_post(now=probe)
+        elapsed = time.perf_counter() - started
+        print(f"  ⏰ next_due_post: {len(probes) / elapsed:,.0f} lookups/s")
+
+        started = time.perf_counter()
+        claimed = 0
+        end = now + timedelta(days=args.days + 1)
+        while (slot := state.next_due_post(now=end)) is not None:
+            best = state.claim_slot(slot)
+            best['posted'] = True
+            state.evict(best)
+            claimed += 1
+        elapsed = time.perf_counter() - started
+        print(f"  🏆 claim_slot + evict: {claimed:,} due slots drained in {elapsed * 1000:.1f} ms "
+              f"({claimed / elapsed:,.0f} slots/s)")
+
+
+def _import_time_us(statement):
+    """Total cumulative import time (µs) of the top-level imports in `statement`"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', statement],
+                            capture_output=True, text=True, cwd=os.path.dirname(os.path.abspath(bot.__file__)))
+    if result.returncode != 0:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    total = 0
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        if not name[1:].startswith(' '):  # top-level module, not a nested import
+            total += int(cumulative)
+    return total
+
+
+def bench_startup(args):
+    baselines = {
+        'bot (lazy imports)': 'import bot',
+        'bot + tweepy/requests/feedparser (old eager imports)': 'import bot, tweepy, requests, feedparser',
+    }
+    results = {}
+    for label, statement in baselines.items():
+        try:
+            results[label] = min(_import_time_us(statement) for _ in range(args.repeat))
+        except RuntimeError as e:
+            print(f"  ✗ {label}: {e}")
+            continue
+        print(f"📦 {label}: {results[label] / 1000:.1f} ms")
+    if len(results) == 2:
+        lazy, eager = results.values()
+        print(f"📉 Import time saved on runs that exit early: {(eager - lazy) / 1000:.1f} ms "
+              f"({eager / max(lazy, 1):.1f}x less)")
+
+    # End to end: an off-hour tick with a full queue never leaves the fast path
+    now = datetime.now(timezone.utc)
+    off_hour = now.hour not in bot.ALLOWED_HOURS_UTC
+    header = {'date': bot.nigeria_today_str(), 'count': 0, 'queue': bot.MIN_QUEUE_SIZE,
+              'next_due': (now + timedelta(hours=1)).timestamp() if off_hour else None,
+              'next_expiry': (now + timedelta(hours=1)).timestamp()}
+    script = os.path.abspath(bot.__file__)
+    with scratch_dir():
+        with open(bot.STATE_HEADER_FILE, 'w') as f:
+            json.dump(header, f)
+        best = float('inf')
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            out = subprocess.run([sys.executable, script], capture_output=True, text=True)
+            best = min(best, time.perf_counter() - started)
+    print(f"⏱️  Fast-path run of bot.py: {best * 1000:.0f} ms wall ({out.stdout.strip()[:80]})")
+
+
+_TITLE_ROLES = ["Sales Manager", "Quality Control Officer", "Business Officer", "Accountant", "Front Desk Officer",
+                "Senior Software Engineer", "Head of Government Affairs", "Customer Service Representative",
+                "Procurement Officer", "Graduate Trainee", "Medical Laboratory Scientist", "HR Generalist"]
+_TITLE_PLACES = ["", " (Ikorodu)", " - Lagos", " - Abuja", " (Port Harcourt)", ", West Africa"]
+_TITLE_NOISE = [("", ""), ("Latest ", ""), ("", " Job"), ("", " Vacancy"), ("", " Job Recruitment")]
+_COMPANY_WORDS = ["Gladiator", "Bosak", "Dangote", "Zenith", "Alpaca", "Consulting", "Seplat", "Andela", "Sterling",
+                  "Kuda", "Paystack", "Flutterwave", "Jumia", "Interswitch", "Lafarge", "Nestle", "Unilever", "Oando"]
+_COMPANY_SUFFIX = ["", " Limited", " Ltd", " Plc", " Nigeria", " Group", " Systems", " Bank", " Enterprises"]
+
+
+def near_dup_corpus(vacancies, seed):
+    """[(vacancy id, opportunity)] — ids repeat for cross-posted copies"""
+    rng = random.Random(seed)
+    corpus = []
+    for vid in range(vacancies):
+        role = rng.choice(_TITLE_ROLES) + rng.choice(_TITLE_PLACES)
+        company = ' '.join(rng.sample(_COMPANY_WORDS, 2)) + rng.choice(_COMPANY_SUFFIX[6:])
+        salary = rng.choice([None, None, f"₦{rng.randrange(80, 900)},000"])
+        for copy in range(rng.choice([1, 1, 2, 3])):
+            prefix, suffix = rng.choice(_TITLE_NOISE)
+            legal = rng.choice(["", " Limited", " Ltd", " Plc"])
+            title = f"{prefix}{role}{suffix} at {company}{legal}"
+            if rng.random() < 0.3:
+                title = title.replace(' - ', ' ').replace('(', '').replace(')', '')
+            corpus.append((vid, {'title': title, 'salary': salary if copy == 0 or rng.random() < 0.5 else None}))
+    rng.shuffle(corpus)
+    return corpus
+
+
+def bench_near_dups(args):
+    corpus = near_dup_corpus(args.vacancies, args.seed)
+    started = time.perf_counter()
+    signatures = [bot.opportunity_signature(opp) for _, opp in corpus]
+    sig_time = time.perf_counter() - started
+
+    index = bot.NearDupIndex(path=None)
+    owner = {}  # signature -> vacancy id that first stored it
+    tp = fp = fn = 0
+    started = time.perf_counter()
+    seen_vacancies = set()
+    for (vid, _), sig in zip(corpus, signatures):
+        match = index.find(sig)
+        if match is not None:
+            if owner[match] == vid:
+                tp += 1
+            else:
+                fp += 1
+        else:
+            if vid in seen_vacancies:
+                fn += 1
+            index.add(sig)
+            owner.setdefault(sig, vid)
+        seen_vacancies.add(vid)
+    lookup_time = time.perf_counter() - started
+
+    stored = list(index.signatures)
+    probes = signatures[:min(len(signatures), 2000)]
+    started = time.perf_counter()
+    for sig in probes:
+        next((s for s in stored if bin(s ^ sig).count('1') <= bot.NEAR_DUP_MAX_DISTANCE), None)
+    linear_time = (time.perf_counter() - started) * len(signatures) / max(len(probes), 1)
+
+    duplicates = len(corpus) - len(seen_vacancies)
+    print(f"👯 Corpus: {len(corpus):,} items, {len(seen_vacancies):,} distinct vacancies, {duplicates:,} cross-posts")
+    print(f"  🎯 precision {tp / max(tp + fp, 1):.3f}  recall {tp / max(duplicates, 1):.3f}  "
+          f"(tp={tp}, fp={fp}, fn={fn})")
+    print(f"  ⚡ signatures: {len(corpus) / sig_time:,.0f}/s   LSH lookups+inserts: {len(corpus) / lookup_time:,.0f}/s")
+    print(f"  🐢 linear scan over {len(stored):,} signatures: {len(corpus) / linear_time:,.0f} lookups/s "
+          f"({linear_time / lookup_time:.0f}x slower)")
+
+    with scratch_dir():
+        index.path = bot.NEAR_DUP_FILE
+        index.dirty = True
+        index.save()
+        size = os.path.getsize(bot.NEAR_DUP_FILE)
+    print(f"  💾 persisted size: {size / 1024:.0f} KB ({size / max(len(index), 1):.0f} bytes/signature)")
+
+
+def bench_extract_pool(args):
+    bodies = synthetic_bodies(args.entries)
+    source = bot.iter_sources([{'name': 'Synthetic', 'url': 'http://localhost/feed'}])[0]
+    pairs = [(source, {'title': f"{_TITLE_ROLES[i % len(_TITLE_ROLES)]} #{i}",
+                       'link': f"https://example.com/jobs/{i}?ref=rss", 'html': body, 'published': None})
+             for i, body in enumerate(bodies)]
+    counts = [int(n) for n in args.processes.split(',')] if args.processes else \
+        sorted({1, 2, 4, os.cpu_count() or 1})
+    print(f"🧮 {len(pairs):,} entries, {os.cpu_count()} CPU(s) available")
+
+    baseline = reference = None
+    for processes in counts:
+        started = time.perf_counter()
+        result = bot.extract_batch(pairs, processes=processes)
+        elapsed = time.perf_counter() - started
+        if reference is None:
+            reference, baseline = result, elapsed
+        same = '✅' if result == reference else '❌ differs from serial'
+        print(f"  {processes:>2} process(es): {elapsed * 1000:7.0f} ms  {len(pairs) / elapsed:9,.0f} entries/s  "
+              f"{baseline / elapsed:4.1f}x  {same}")
+
+
+_TWEET_TITLES = ["Senior Software Engineer (Backend, Python/Django) at Flutterwave Technologies Limited",
+                 "Graduate Trainee Programme 2026 for Fresh Graduates in Lagos, Abuja and Port Harcourt",
+                 "Accountant", "Quality Control Officer at Nestle Nigeria Plc",
+                 "Chevening Scholarships 2026/2027 for Master's Study in the United Kingdom (Fully Funded)",
+                 "Ingeniero de Software Sénior — Énfasis en Sistemas Distribuidos y Observabilidad",
+                 "ソフトウェアエンジニア（バックエンド）募集 東京本社 リモート可 年収800万円以上 経験者優遇 英語力歓迎",
+                 "🚀🔥 Hiring NOW!!! 👩‍💻 Frontend Dev 🇳🇬 Remote-friendly ✅ Apply at careers.example.io today"]
+_TWEET_BENEFITS = list(bot.BENEFIT_KEYWORDS)
+
+
+def tweet_corpus(n, seed):
+    rng = random.Random(seed)
+    items = []
+    for i in range(n):
+        title = rng.choice(_TWEET_TITLES)
+        if rng.random() < 0.3:
+            title = (title + ' ') * rng.randint(2, 5)
+        scholarship = rng.random() < 0.3
+        items.append({
+            'type': 'scholarship' if scholarship else 'job',
+            'title': title.strip(),
+            'location': rng.choice(['Remote 🌍', 'Lagos, Nigeria 🇳🇬', 'Port Harcourt, Nigeria 🇳🇬',
+                                    'International 🌍', 'Nigeria 🇳🇬']),
+            'salary': rng.choice([None, '$120k - $160k/yr', '₦350,000 - ₦500,000/month']),
+            'email': rng.choice([None, 'hr@acme.ng', 'graduate.recruitment.team@averyverylongcompanyname.com.ng']),
+            'benefits': rng.sample(_TWEET_BENEFITS, rng.randint(0, bot.TWEET_MAX_BENEFITS)),
+            'url': f"https://www.example.com/jobs/{i}/" + 'x' * rng.choice([0, 40, 300]),
+            'tags': rng.choice([None, None, ['#Internships', '#GraduateJobs', '#Nigeria', '#Hiring', '#Careers']]),
+        })
+    return items
+
+
+def bench_tweets(args):
+    items = tweet_corpus(args.items, args.seed)
+    started = time.perf_counter()
+    tweets = [bot.format_rich_tweet(item) for item in items]
+    elapsed = time.perf_counter() - started
+    print(f"🐦 Rendered {len(tweets):,} tweets in {elapsed * 1000:.1f} ms ({len(tweets) / elapsed:,.0f} tweets/s)")
+
+    weights = [bot.tweet_weight(t) for t in tweets]
+    trimmed = sum(1 for item, t in zip(items, tweets)
+                  if item['title'][:bot.TWEET_TITLE_MAX_CHARS] not in t or
+                  any(b not in t for b in item['benefits']))
+    print(f"  📏 weight: max {max(weights)}, mean {sum(weights) / len(weights):.0f}; "
+          f"{trimmed:,} needed trimming")
+
+
+# ============================================================================
+# OFFLINE SUITE
+# ============================================================================
+
+def bench_record(args):
+    import requests
+    os.makedirs(args.out, exist_ok=True)
+    for source in bot.iter_sources():
+        path = os.path.join(args.out, f"{source['name']}.xml")
+        try:
+            response = requests.get(source['url'], headers=bot.REQUEST_HEADERS, timeout=bot.FEED_TIMEOUT_SECONDS)
+            response.raise_for_status()
+        except Exception as e:
+            print(f"  ✗ {source['name']}: {e}")
+            continue
+        with open(path, 'wb') as f:
+            f.write(response.content)
+        print(f"  ✓ {source['name']}: {len(response.content) / 1024:.0f} KB → {path}")
+
+
+def fixture_entries(directory):
+    """{source name: [entry, ...]} parsed from recorded feeds (DIR/<name>.xml)"""
+    fixtures = {}
+    for path in sorted(glob.glob(os.path.join(directory, '*.xml')) + glob.glob(os.path.join(directory, '*.rss'))):
+        with open(path, 'rb') as f:
+            entries = list(bot.iter_feed_entries([f.read()]))
+        if entries:
+            fixtures[os.path.splitext(os.path.basename(path))[0]] = entries
+    return fixtures
+
+
+def synthetic_fixtures(per_source, seed=1):
+    """Entries shaped like each registered source's feed"""
+    fixtures = {}
+    for i, source in enumerate(bot.iter_sources()):
+        bodies = synthetic_bodies(per_source, seed=seed + i)
+        titles = [f"{_TITLE_ROLES[j % len(_TITLE_ROLES)]} at {_COMPANY_WORDS[j % len(_COMPANY_WORDS)]}"
+                  for j in range(per_source)]
+        if source['type'] == 'scholarship':
+            titles = [f"Fully Funded Scholarship for {t}" for t in titles]
+        fixtures[source['name']] = [{'title': t, 'link': f"https://example.com/{source['name']}/{j}",
+                                     'html': body, 'published': None}
+                                    for j, (t, body) in enumerate(zip(titles, bodies))]
+    return fixtures
+
+
+def scaled_feed(entries, count, salt):
+    """RSS with `count` items cycled from `entries`, every link unique"""
+    items = []
+    for i in range(count):
+        entry = entries[i % len(entries)]
+        link = f"{(entry['link'] or 'https://example.com/item').rstrip('/')}/bench-{salt}-{i}"
+        items.append(f"<item><title>{escape(entry['title'])}</title><link>{escape(link)}</link>"
+                     f"<description>{escape(entry['html'] or '')}</description></item>")
+    return ('<?xml version="1.0" encoding="utf-8"?><rss version="2.0"><channel><title>bench</title>'
+            + ''.join(items) + '</channel></rss>').encode('utf-8')
+
+
+class FeedStub:
+    """Local HTTP server replaying feed payloads: {path: bytes, or a
+    callable returning the bytes to serve right now}. `delays` holds
+    {path: seconds} to wait before answering, `trickle` {path: seconds}
+    to pause between each FEED_CHUNK_BYTES of the body; `peak` is the most
+    requests it ever had in flight at once."""
+
+    def __init__(self, payloads, delays=None, trickle=None):
+        payloads = dict(payloads)
+        delays = dict(delays or {})
+        trickle = dict(trickle or {})
+        lock = threading.Lock()
+        stub = self
+        self.active = self.peak = 0
+
+        class Handler(http.server.BaseHTTPRequestHandler):
+            def do_GET(self):
+                with lock:
+                    stub.active += 1
+                    stub.peak = max(stub.peak, stub.active)
+                try:
+                    time.sleep(delays.get(self.path, 0))
+                    body = payloads.get(self.path)
+                    if callable(body):
+                        body = body()
+                    self.send_response(200 if body is not None else 404)
+                    self.send_header('Content-Type', 'application/rss+xml')
+                    self.send_header('Content-Length', str(len(body or b'')))
+                    self.end_headers()
+                    body = body or b''
+                    step = bot.FEED_CHUNK_BYTES if self.path in trickle else len(body) or 1
+                    for offset in range(0, len(body), step):
+                        if offset:
+                            time.sleep(trickle[self.path])
+                        self.wfile.write(body[offset:offset + step])
+                        self.wfile.flush()
+                except OSError:
+                    pass  # the client gave up (deadline/timeout) mid-request
+                finally:
+                    with lock:
+                        stub.active -= 1
+
+            def log_message(self, *args):
+                pass
+
+        self.server = http.server.ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.base = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class FakeClient:
+    """Stands in for tweepy.Client; every tweet succeeds"""
+
+    def __init__(self, account=None):
+        self.tweets = []
+
+    def create_tweet(self, text):
+        self.tweets.append(text)
+        return {'data': {'id': str(len(self.tweets))}}
+
+
+@contextlib.contextmanager
+def fresh_bot_state():
+    """Empty scratch cwd, no cached per-run singletons, bot output silenced"""
+    with scratch_dir() as tmp, contextlib.redirect_stdout(io.StringIO()):
+        caches = (bot._posted_stores, bot._state_dbs, bot._clients)
+        for cache in caches:
+            cache.clear()
+        try:
+            yield tmp
+        finally:
+            for cache in caches:
+                cache.clear()
+
+
+def _percentiles(samples):
+    ordered = sorted(samples)
+    pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    return {'p50': pick(0.50), 'p95': pick(0.95), 'p99': pick(0.99)}
+
+
+def _measure(setup, fn, repeat, units):
+    """Time fn(setup()) `repeat` times, then once more under tracemalloc"""
+    samples = []
+    for _ in range(repeat):
+        with fresh_bot_state():
+            arg = setup()
+            started = time.perf_counter()
+            fn(arg)
+            samples.append(time.perf_counter() - started)
+    with fresh_bot_state():
+        arg = setup()
+        tracemalloc.start()
+        try:
+            fn(arg)
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    stats = {k: round(v * 1000, 3) for k, v in _percentiles(samples).items()}
+    stats.update(throughput=round(units / stats['p50'] * 1000, 1) if stats['p50'] else None,
+                 peak_kb=round(peak / 1024), samples=len(samples))
+    return stats
+
+
+def queue_fixture(size, now):
+    """A queue like one left behind by earlier runs: some posted, some stale"""
+    rng = random.Random(size)
+    queue = []
+    for i in range(size):
+        added = now - timedelta(hours=rng.uniform(0, bot.MAX_QUEUE_AGE_HOURS * 1.5))
+        scheduled = now + timedelta(hours=rng.uniform(-6, 72))
+        queue.append({'tweet_text': f"🔥 Queued item {i}\n\n🔗 https://example.com/q/{i}",
+                      'url': f"https://example.com/q/{i}", 'posted': rng.random() < 0.2,
+                      'scheduled_time': scheduled.replace(minute=0, second=0, microsecond=0).isoformat(),
+                      'added_at': added.isoformat()})
+    return queue
+
+
+def bench_suite(args):
+    sizes = [int(n) for n in args.sizes.split(',')]
+    queue_sizes = [int(n) for n in args.queue_sizes.split(',')]
+    fixtures = synthetic_fixtures(200) if args.synthetic else fixture_entries(args.fixtures)
+    if not fixtures:
+        print(f"❌ No recorded feeds found in {args.fixtures}")
+        raise SystemExit(1)
+    registry = {s['name']: s for s in bot.iter_sources()}
+    print(f"📚 Fixtures: {sum(map(len, fixtures.values())):,} entries from {len(fixtures)} "
+          f"{'synthetic' if args.synthetic else 'recorded'} feed(s)")
+
+    saved = {name: getattr(bot, name) for name in
+             ('SOURCES', 'FEED_MAX_SCAN_ENTRIES', 'ALLOWED_HOURS_UTC', 'CATCHUP_SPACING_SECONDS',
+              'authenticate_twitter')}
+    bot.ALLOWED_HOURS_UTC = list(range(24))
+    bot.CATCHUP_SPACING_SECONDS = 0
+    bot.authenticate_twitter = FakeClient
+    results = {}
+
+    def report(key, stats, unit):
+        results[key] = stats
+        print(f"  {key:<28} p50 {stats['p50']:>10.2f} ms  p95 {stats['p95']:>10.2f} ms  "
+              f"p99 {stats['p99']:>10.2f} ms  {stats['throughput'] or 0:>12,.0f} {unit}/s  "
+              f"peak {stats['peak_kb']:>8,} KB")
+
+    try:
+        for n in sizes:
+            repeat = args.repeat if n <= 10000 else 1
+            per_feed = max(1, n // len(fixtures))
+            payloads = {f"/{name}": scaled_feed(entries, per_feed, n) for name, entries in fixtures.items()}
+            stub = FeedStub(payloads)
+            try:
+                bot.FEED_MAX_SCAN_ENTRIES = per_feed
+                bot.SOURCES = [{**registry.get(name, {}), 'name': name, 'url': f"{stub.base}/{name}",
+                                'limit': per_feed, 'refresh_minutes': 0} for name in fixtures]
+                total = per_feed * len(fixtures)
+                report(f"refill_queue/{total}",
+                       _measure(list, lambda schedule: bot.refill_queue(schedule), repeat, total), 'entries')
+
+                # A whole run whose queue is below MIN_QUEUE_SIZE: it fetches,
+                # extracts and refills from the stub before posting
+                def write_low_state():
+                    bot.save_json(bot.SCHEDULE_FILE, queue_fixture(bot.MIN_QUEUE_SIZE - 1,
+                                                                   datetime.now(timezone.utc)))
+                    bot.save_json(bot.DAILY_TRACKER_FILE, {'date': 'stale', 'count': 0})
+
+                report(f"main+refill/{total}",
+                       _measure(write_low_state, lambda _: bot.main(full=True), repeat, total), 'entries')
+                with fresh_bot_state():
+                    write_low_state()
+                    bot.main(full=True)
+                    queued = sum(1 for p in bot.BotState().schedule if '/q/' not in p['url'])
+                if not queued:
+                    print(f"  ❌ main+refill/{total} queued nothing from the feed stub")
+                    raise SystemExit(1)
+            finally:
+                stub.close()
+
+            bodies = [e['html'] or '' for entries in fixtures.values() for e in entries]
+            bodies = [bodies[i % len(bodies)] for i in range(n)]
+            per_call = []
+            for body in bodies[:min(n, 20000)]:
+                started = time.perf_counter()
+                bot.extract_smart_details(body)
+                per_call.append(time.perf_counter() - started)
+            stats = _measure(lambda: bodies, lambda b: [bot.extract_smart_details(x) for x in b], 1, n)
+            stats.update({k: round(v * 1e6, 3) for k, v in _percentiles(per_call).items()})
+            stats['latency_unit'] = 'us per entry'
+            results[f"extract_smart_details/{n}"] = stats
+            print(f"  {'extract_smart_details/' + str(n):<28} p50 {stats['p50']:>10.2f} µs  "
+                  f"p95 {stats['p95']:>10.2f} µs  p99 {stats['p99']:>10.2f} µs  "
+                  f"{stats['throughput'] or 0:>12,.0f} entries/s  peak {stats['peak_kb']:>8,} KB")
+
+        bot.SOURCES = []  # these time the queue work alone; main+refill covers the feeds
+        for q in queue_sizes:
+            repeat = args.repeat if q <= 1000 else max(1, args.repeat // 2)
+            now = datetime.now(timezone.utc)
+            queue = queue_fixture(q, now)
+
+            def write_state(queue=queue):
+                bot.save_json(bot.SCHEDULE_FILE, queue)
+                bot.save_json(bot.DAILY_TRACKER_FILE, {'date': 'stale', 'count': 0})
+
+            report(f"cleanup_old_data/{q}",
+                   _measure(lambda: write_state() or bot.BotState(), bot.cleanup_old_data, repeat, q), 'items')
+            report(f"main/{q}", _measure(write_state, lambda _: bot.main(full=True), repeat, q), 'items')
+    finally:
+        for name, value in saved.items():
+            setattr(bot, name, value)
+
+    document = {'meta': {'at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+                         'python': platform.python_version(), 'platform': platform.platform(),
+                         'cpus': os.cpu_count(), 'fixtures': 'synthetic' if args.synthetic else args.fixtures},
+                'results': results}
+    with open(args.save, 'w') as f:
+        json.dump(document, f, indent=2)
+    print(f"💾 Results saved to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)['results']
+        regressions = 0
+        print(f"📊 Compared with {args.compare} (tolerance {args.tolerance:.0f}%):")
+        for key, stats in results.items():
+            if key not in baseline or not baseline[key]['p50']:
+                continue
+            change = (stats['p50'] / baseline[key]['p50'] - 1) * 100
+            regressed = change > args.tolerance
+            regressions += regressed
+            print(f"  {'❌' if regressed else '✅'} {key:<28} {change:+7.1f}% p50")
+        if regressions:
+            raise SystemExit(1)
+
+
+def _file_stats(directory):
+    stats = {}
+    for root, _, files in os.walk(directory):
+        for name in files:
+            st = os.stat(os.path.join(root, name))
+            stats[os.path.join(root, name)] = (st.st_ino, st.st_size)
+    return stats
+
+
+def _bytes_written(before, after, by_file):
+    """Bytes written between two _file_stats() snapshots: a new or replaced
+    (atomically rewritten) file counts in full, an appended one by its growth"""
+    total = 0
+    for path, (inode, size) in after.items():
+        old = before.get(path)
+        grown = size if old is None or old[0] != inode else max(size - old[1], 0)
+        by_file[os.path.basename(path)] = by_file.get(os.path.basename(path), 0) + grown
+        total += grown
+    return total
+
+
+def bench_journal(args):
+    rng = random.Random(args.seed)
+    accounts = bot.iter_accounts([{'name': 'json', 'state_dir': 'json'},
+                                  {'name': 'journal', 'state_dir': 'journal'}])
+    written = {'json': 0, 'journal': 0, 'shared': 0}
+    by_file = {'json': {}, 'journal': {}, 'shared': {}}
+    compactions = [0]
+    saved_backend = bot.STATE_BACKEND
+
+    def load(account):
+        bot.STATE_BACKEND = account['name']
+        try:
+            state = bot.BotState(account)
+        finally:
+            bot.STATE_BACKEND = saved_backend
+        if state.journal is not None:
+            compact = state.journal.compact
+            def counted_compact(*a, **kw):
+                compactions[0] += 1
+                return compact(*a, **kw)
+            state.journal.compact = counted_compact
+        return state
+
+    def fetch(sim_now):
+        # What collect_opportunities() persists on a refill, shared by every
+        # account and backend: the feed cache and the per-source stats
+        health = bot.SourceHealth()
+        cache = bot.load_json(bot.FEED_CACHE_FILE)
+        for source in bot.iter_sources():
+            cache[source['url']] = {'fetched_at': sim_now, 'prefix_hash': '%016x' % rng.getrandbits(64),
+                                    'etag': f'W/"{rng.getrandbits(32):x}"', 'last_modified': None}
+            health.record(source['name'], {'status': 'changed', 'seconds': rng.uniform(0.2, 2.0),
+                                           'bytes': rng.randint(20_000, 200_000), 'error': None},
+                          yielded=rng.randint(0, 10), now=sim_now)
+        bot.save_json(bot.FEED_CACHE_FILE, cache)
+        health.save()
+
+    with fresh_bot_state():
+        for run in range(args.runs):
+            states = [load(account) for account in accounts]
+
+            # One cron run's worth of changes, applied identically to both;
+            # simulated time moves 30 minutes a run
+            sim_now = time.time() + run * 1800
+            new_day = run % 48 == 0
+            refill = [{'tweet_text': f"🔥 Job {run}-{i}\n\n🔗 https://example.com/j/{run}/{i}",
+                       'url': f"https://example.com/j/{run}/{i}", 'type': rng.choice(['job', 'scholarship']),
+                       'score': round(rng.uniform(0, 100), 2), 'posted': False,
+                       'scheduled_time': datetime.fromtimestamp(sim_now + (i + rng.random()) * 2 * 3600,
+                                                                timezone.utc).isoformat(),
+                       'added_at': datetime.fromtimestamp(sim_now, timezone.utc).isoformat(),
+                       'added_epoch': sim_now}
+                      for i in range(10)]
+            signatures = [rng.getrandbits(64) for _ in refill]
+            max_posts = rng.randint(0, 2)
+            due_at = datetime.fromtimestamp(sim_now, timezone.utc)
+            if any(sum(1 for p in state.schedule if not p.get('posted', False)) < bot.MIN_QUEUE_SIZE
+                   for state in states):
+                before = _file_stats('.')
+                fetch(sim_now)
+                written['shared'] += _bytes_written(before, _file_stats('.'), by_file['shared'])
+            for state in states:
+                before = _file_stats(state.account['state_dir'])
+                if new_day:
+                    state.tracker = {'date': f"day-{run // 48}", 'count': 0}
+                    state.mark_dirty('tracker')
+                state.expire(now=sim_now)
+                if sum(1 for p in state.schedule if not p.get('posted', False)) < bot.MIN_QUEUE_SIZE:
+                    for signature in signatures:
+                        state.near_dups.add(signature, when=sim_now)
+                    state.enqueue(copy.deepcopy(refill))
+                engine = bot.PostingEngine(state, FakeClient(), sleep=lambda seconds: None)
+                for _ in range(max_posts):
+                    slot = state.next_due_post(now=due_at)
+                    if slot is None or not engine.drain(max_posts=1, post=slot):
+                        break
+                state.flush()
+                written[state.name] += _bytes_written(before, _file_stats(state.account['state_dir']),
+                                                      by_file[state.name])
+
+    bot.STATE_BACKEND = saved_backend
+    runs = max(args.runs, 1)
+
+    def breakdown(name):
+        files = sorted(by_file[name].items(), key=lambda item: -item[1])
+        return ', '.join(f"{filename} {size / runs:,.0f}" for filename, size in files if size >= runs)
+
+    total = {name: written[name] + written['shared'] for name in ('json', 'journal')}
+    print(f"🗒️  {args.runs:,} simulated runs, {compactions[0]} journal compaction(s); bytes written per run, "
+          f"including {written['shared'] / runs:,.0f} of feed cache + source stats")
+    print(f"  💾 json backend:    {total['json'] / runs:>10,.0f}  ({breakdown('json')})")
+    print(f"  🗒️  journal backend: {total['journal'] / runs:>10,.0f}  ({breakdown('journal')}) "
+          f"— {total['json'] / max(total['journal'], 1):.1f}x less")
+    print(f"  🌐 shared:          {written['shared'] / runs:>10,.0f}  ({breakdown('shared')})")
+
+
+def bench_fetch(args):
+    entries = next(iter(synthetic_fixtures(20).values()))
+    payload = scaled_feed(entries, 20, 'fetch')
+    slowest = args.slowest
+    delays = [slowest * f for f in (0.2, 0.5, 0.8, 1.0)]
+
+    def fetch(stubs, paths, **kwargs):
+        urls = [f"{stub.base}{path}" for stub in stubs for path in paths]
+        try:
+            with fresh_bot_state():
+                started = time.perf_counter()
+                bot.fetch_feeds(urls, use_cache=False, **kwargs)
+                return time.perf_counter() - started
+        finally:
+            for stub in stubs:
+                stub.close()
+
+    print("🌐 fetch_feeds against delayed local feeds")
+    elapsed = fetch([FeedStub({'/feed': payload}, {'/feed': delay}) for delay in delays], ['/feed'])
+    print(f"  {len(delays)} hosts, slowest {slowest:.2f}s:  {elapsed:.2f}s wall "
+          f"(one after another: {sum(delays):.2f}s)")
+
+    deadline = slowest * 1.5
+    elapsed = fetch([FeedStub({'/feed': payload}, {'/feed': delay}) for delay in delays + [deadline * 2]],
+                    ['/feed'], deadline=deadline)
+    print(f"  + one feed past a {deadline:.2f}s deadline:  {elapsed:.2f}s wall")
+
+    count = bot.PER_HOST_CONCURRENCY * 4
+    paths = [f"/feed{i}" for i in range(count)]
+    stub = FeedStub({path: payload for path in paths}, {path: slowest / 4 for path in paths})
+    elapsed = fetch([stub], paths)
+    print(f"  {count} feeds on one host ({slowest / 4:.2f}s each):  {elapsed:.2f}s wall, "
+          f"{stub.peak} in flight at most (PER_HOST_CONCURRENCY {bot.PER_HOST_CONCURRENCY})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest='bench', required=True)
+
+    p = sub.add_parser('extraction', help='extract_smart_details vs the BeautifulSoup original')
+    p.add_argument('--corpus', default=FIXTURES_DIR, help='directory of saved feed files (*.xml, *.rss)')
+    p.add_argument('--synthetic', action='store_true', help='use a generated corpus instead of saved feeds')
+    p.add_argument('--entries', type=int, default=2000, help='synthetic corpus size')
+    p.add_argument('--repeat', type=int, default=3)
+    p.set_defaults(func=bench_extraction)
+
+    p = sub.add_parser('slots', help='SlotAllocator, next_due_post and claim_slot throughput')
+    p.add_argument('--items', type=int, default=10000)
+    p.add_argument('--days', type=int, default=30)
+    p.add_argument('--seed', type=int, default=7)
+    p.set_defaults(func=bench_slots)
+
+    p = sub.add_parser('startup', help='import-time savings from lazy imports and the fast path')
+    p.add_argument('--repeat', type=int, default=5)
+    p.set_defaults(func=bench_startup)
+
+    p = sub.add_parser('near-dups', help='SimHash/LSH near-duplicate precision, recall and throughput')
+    p.add_argument('--vacancies', type=int, default=5000)
+    p.add_argument('--seed', type=int, default=3)
+    p.set_defaults(func=bench_near_dups)
+
+    p = sub.add_parser('extract-pool', help='process-pool extraction scaling with core count')
+    p.add_argument('--entries', type=int, default=5000)
+    p.add_argument('--processes', help='comma-separated process counts (default 1,2,4,cpu_count)')
+    p.set_defaults(func=bench_extract_pool)
+
+    p = sub.add_parser('tweets', help='tweet rendering throughput and weighted lengths')
+    p.add_argument('--items', type=int, default=5000)
+    p.add_argument('--seed', type=int, default=11)
+    p.set_defaults(func=bench_tweets)
+
+    p = sub.add_parser('record', help="save every registered source's current feed for offline replay")
+    p.add_argument('--out', default=FIXTURES_DIR, help='directory to write <source>.xml files into')
+    p.set_defaults(func=bench_record)
+
+    p = sub.add_parser('suite', help='offline refill/extraction/cleanup/main benchmarks with saved results')
+    p.add_argument('--fixtures', default=FIXTURES_DIR, help='directory of recorded feeds')
+    p.add_argument('--synthetic', action='store_true', help='use a generated corpus instead of recorded feeds')
+    p.add_argument('--sizes', default='10,100,1000,10000,100000', help='corpus sizes (entries)')
+    p.add_argument('--queue-sizes', default='10,100,1000,10000', help='queue sizes (items)')
+    p.add_argument('--repeat', type=int, default=5)
+    p.add_argument('--save', default='benchmark_results.json')
+    p.add_argument('--compare', help='earlier results file to check for regressions')
+    p.add_argument('--tolerance', type=float, default=10.0, help='allowed p50 slowdown, percent')
+    p.set_defaults(func=bench_suite)
+
+    p = sub.add_parser('journal', help='bytes written per run, journal vs JSON backend')
+    p.add_argument('--runs', type=int, default=500)
+    p.add_argument('--seed', type=int, default=5)
+    p.set_defaults(func=bench_journal)
+
+    p = sub.add_parser('fetch', help='fetch_feeds wall time on delayed feeds')
+    p.add_argument('--slowest', type=float, default=1.0, help='delay of the slowest feed, in seconds')
+    p.set_defaults(func=bench_fetch)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,13 +1,25 @@
-import tweepy
-import feedparser
-import requests
-from bs4 import BeautifulSoup
+# NOTE: tweepy, requests and feedparser are imported inside the functions
+# that use them. Most cron ticks exit through fast_path_check() and never
+# need them, so we don't pay for those imports up front.
 import time
 import random
 import os
 from datetime import datetime, timezone, timedelta
 import json
 import re
+import argparse
+import heapq
+import itertools
+import contextlib
+import copy
+import signal
+import threading
+import atexit
+from urllib.parse import urlsplit, urlunsplit
+import html
+import html.entities as html_entities
+import unicodedata
+from html.parser import HTMLParser
 
 # ============================================================================
 # CONFIGURATION
@@ -19,8 +31,16 @@ ACCESS_TOKEN = os.getenv('ACCESS_TOKEN')
 ACCESS_TOKEN_SECRET = os.getenv('ACCESS_TOKEN_SECRET')
 
 SCHEDULE_FILE = 'scheduled_posts.json'
-POSTED_URLS_FILE = 'posted_urls.json'
+POSTED_URLS_FILE = 'posted_urls.json'          # legacy list, migrated on first load
+POSTED_HISTORY_FILE = 'posted_history.jsonl'   # append-only: one {"url", "at"} per line
 DAILY_TRACKER_FILE = 'daily_post_count.json'
+FEED_CACHE_FILE = 'feed_cache.json'
+STATE_HEADER_FILE = 'state_header.json'        # tiny summary read by fast_path_check()
+NEAR_DUP_FILE = 'near_dup_index.jsonl'         # append-only: one {"sig", "at"} per queued/posted item
+NEAR_DUP_LEGACY_FILE = 'near_dup_index.json'   # legacy {signature: epoch} map, migrated on first load
+SOURCE_STATS_FILE = 'source_stats.json'        # per-source latency/yield + circuit breaker
+POSTING_STATE_FILE = 'posting_state.json'      # X rate-limit window + in-flight post marker
+STATE_JOURNAL_FILE = 'state_journal.jsonl'     # append-only changes on top of the three files above
 
 # 🛑 SAFETY LIMIT (Total max posts per day)
 DAILY_LIMIT = 10 
@@ -29,6 +49,38 @@ DAILY_LIMIT = 10
 # This is what actually guarantees "latest update only" — not the calendar date.
 MAX_QUEUE_AGE_HOURS = 36
 
+# 💾 STATE SERIALIZATION — set COMPACT_STATE=1 to write state files without
+# indentation (smaller files / diffs, less readable)
+COMPACT_STATE = os.getenv('COMPACT_STATE') == '1'
+
+# 🗄️ STORAGE BACKEND — 'journal' (the queue, daily count and posting state
+# are snapshots in their JSON files plus an append-only STATE_JOURNAL_FILE of
+# changes, so a run appends a few lines instead of rewriting whole files),
+# 'json' (one file per kind of state, rewritten whenever it changes) or
+# 'sqlite' (a single WAL-mode database with indexed tables and unbounded
+# posted history). On first use the sqlite backend imports whatever JSON
+# state already exists.
+STATE_BACKEND = os.getenv('STATE_BACKEND', 'journal').lower()
+STATE_DB_FILE = 'bot_state.db'
+JOURNAL_COMPACT_BYTES = 64 * 1024  # fold the journal into the snapshots past this size
+
+# 📈 METRICS — every run appends one JSON line (stage timings and counters)
+# to METRICS_FILE; `python bot.py --profile` also dumps cProfile stats.
+METRICS_FILE = 'run_metrics.jsonl'
+PROFILE_FILE = 'run_profile.prof'
+
+# 📭 Refill the queue when it holds fewer than this many unposted items
+MIN_QUEUE_SIZE = 5
+
+# 🧾 DEDUP RETENTION — a posted URL is never reposted within this window
+POSTED_RETENTION_DAYS = 90
+
+# 👯 NEAR-DUPLICATES — the same vacancy cross-posted under different URLs
+# is caught by comparing 64-bit SimHash signatures of title + details.
+NEAR_DUP_MAX_DISTANCE = 3      # max differing bits to count as a duplicate
+NEAR_DUP_BANDS = 4             # LSH bands; must be > NEAR_DUP_MAX_DISTANCE
+NEAR_DUP_RETENTION_DAYS = 30
+
 # ⏰ POSTING SCHEDULE (UTC TIMES)
 # Nigeria is UTC+1. So 7 UTC = 8 AM Nigeria.
 # These 10 slots spread the 10 posts throughout the day.
@@ -45,42 +97,1031 @@ ALLOWED_HOURS_UTC = [
     21   # 10 PM WAT (Late Night)
 ]
 
+# 👥 ACCOUNTS — one deployment can post to several X accounts. Feeds are
+# scraped once per run and each opportunity is queued for every account
+# whose filters match it. Per account:
+#   'types'        opportunity types it posts, e.g. ['scholarship'] (None = all)
+#   'locations'    location label substrings, e.g. ['Remote'] (None = all)
+#   'env_prefix'   credentials come from <prefix>API_KEY, <prefix>API_SECRET,
+#                  <prefix>ACCESS_TOKEN and <prefix>ACCESS_TOKEN_SECRET
+#   'state_dir'    where its queue, posted history and counters live
+#                  (default: the repo root for the first account,
+#                  accounts/<name>/ for the others)
+#   'daily_limit' / 'allowed_hours_utc'  override DAILY_LIMIT / ALLOWED_HOURS_UTC
+ACCOUNT_DEFAULTS = {
+    'types': None,
+    'locations': None,
+    'env_prefix': '',
+    'state_dir': None,
+    'daily_limit': None,
+    'allowed_hours_utc': None,
+}
+ACCOUNTS = [
+    {'name': 'default'},
+    # {'name': 'remote', 'locations': ['Remote'], 'env_prefix': 'REMOTE_'},
+    # {'name': 'scholarships', 'types': ['scholarship'], 'env_prefix': 'SCHOLARSHIP_',
+    #  'daily_limit': 5, 'allowed_hours_utc': [8, 12, 18]},
+]
+
+# 📤 POSTING — transient X API failures (5xx, network) are retried with
+# jittered exponential backoff; a 429 pauses posting until X's reset time.
+POST_MAX_ATTEMPTS = 3
+POST_RETRY_BASE_SECONDS = 2
+POST_RETRY_MAX_SECONDS = 30
+# When several slots are overdue (missed cron ticks, a rate-limit pause),
+# drain up to this many in one run, CATCHUP_SPACING_SECONDS apart.
+MAX_CATCHUP_POSTS = 3
+CATCHUP_SPACING_SECONDS = 20
+RATE_LIMIT_FALLBACK_MINUTES = 15   # pause when a 429 carries no reset header
+
+# 🐦 TWEET LENGTH — X counts most non-Latin characters and every emoji as 2,
+# and every link as 23 (t.co wrapping) whatever its real length. Tweets are
+# trimmed (extra tags, extra benefits, then the title) until they fit.
+TWEET_MAX_WEIGHT = 280
+TWEET_URL_WEIGHT = 23
+TWEET_TITLE_MAX_CHARS = 70
+TWEET_TITLE_MIN_CHARS = 30   # shorten the title below this only as a last resort
+TWEET_MAX_BENEFITS = 3
+
+# 🏅 RANKING — every opportunity is scored once when it is queued (the score
+# is stored on the item), and each posting slot goes to the best-scored
+# unposted item. Score = sum of SCORE_WEIGHTS, each scaled 0..1:
+#   freshness  halves every FRESHNESS_HALF_LIFE_HOURS since the feed's publish date
+#   salary     a salary (or full funding) was found
+#   email      an application email was found
+#   benefits   benefits found, out of MAX_BENEFITS
+#   source     the source's 'quality'
+# Refills also keep jobs vs scholarships near TYPE_TARGET_SHARE of the queue.
+SCORE_WEIGHTS = {'freshness': 40, 'salary': 20, 'email': 10, 'benefits': 15, 'source': 15}
+FRESHNESS_HALF_LIFE_HOURS = 24
+TYPE_TARGET_SHARE = {'job': 0.7, 'scholarship': 0.3}
+TYPE_BALANCE_WEIGHT = 30   # score points per unit of share below (bonus) / above (penalty) target
+REFILL_BATCH_SIZE = 10     # new posts queued per refill
+RANK_POOL_SIZE = 30        # best candidates per type kept while ranking a refill
+
+# 🗓️ SLOT ALLOCATION — free slots are generated this many days ahead at a time
+SLOT_HORIZON_DAYS = 7
+
+# 👹 DAEMON MODE (python bot.py --daemon)
+REFILL_INTERVAL_MINUTES = 30    # how often the daemon runs cleanup + refill
+DAEMON_MAX_SLEEP_SECONDS = 300  # never sleep longer than this between checks
+
+# 📡 SOURCES — every feed the bot scrapes, fetched concurrently on each
+# refill. Adding a source is just adding a dict here; keys left out fall
+# back to SOURCE_DEFAULTS.
+#   name, url         identifies the feed (name keys the stats/breaker state)
+#   type              'job' or 'scholarship' — picks how entries become posts
+#   limit             new (not yet posted) entries to take per refill
+#   locations         [(keyword in title, location label), ...], first match wins
+#   default_location  location when no keyword matches
+#   tags              hashtags for this source's tweets (None: chosen by type/location)
+#   refresh_minutes   minimum time between fetches (None: FEED_DEFAULT_REFRESH_MINUTES)
+#   quality           0..1, how much ranking favours this source's posts
+NIGERIA_CITIES = [('lagos', 'Lagos 🇳🇬'), ('abuja', 'Abuja 🇳🇬')]
+SOURCE_DEFAULTS = {
+    'type': 'job',
+    'limit': 5,
+    'locations': NIGERIA_CITIES,
+    'default_location': 'Nigeria 🇳🇬',
+    'tags': None,
+    'refresh_minutes': None,
+    'quality': 1.0,
+}
+SOURCES = [
+    {'name': 'RemoteOK', 'url': 'https://remoteok.com/remote-jobs.rss',
+     'default_location': 'Remote 🌍'},
+    {'name': 'HotNigerianJobs', 'url': 'https://hotnigerianjobs.com/feed/'},
+    {'name': 'MyJobMag', 'url': 'https://www.myjobmag.com/feed'},
+    {'name': 'OpportunitiesForAfricans', 'url': 'https://www.opportunitiesforafricans.com/feed/',
+     'type': 'scholarship', 'limit': 3, 'locations': [], 'default_location': 'International 🌍',
+     'refresh_minutes': 180},
+    {'name': 'Scholars4Dev', 'url': 'https://www.scholars4dev.com/feed/',
+     'type': 'scholarship', 'limit': 3, 'locations': [], 'default_location': 'International 🌍',
+     'refresh_minutes': 180},
+]
+
+# 🧮 EXTRACTION — big refills fan entry parsing out to worker processes.
+# Batches smaller than EXTRACT_PARALLEL_MIN_ENTRIES run in-process, since
+# starting workers would cost more than it saves.
+EXTRACT_PROCESSES = None            # None = os.cpu_count()
+EXTRACT_PARALLEL_MIN_ENTRIES = 200
+EXTRACT_CHUNK_SIZE = 50
+
+# 🔌 CIRCUIT BREAKER — a source that keeps failing is skipped (without a
+# request) for an exponentially growing cool-down instead of burning a
+# timeout every run.
+BREAKER_BASE_MINUTES = 30
+BREAKER_MAX_MINUTES = 24 * 60
+
+# 🚦 FETCH LIMITS
+# Refill wall time is bounded by the slowest feed (capped by the deadline),
+# not by the sum of every feed's response time.
+FEED_TIMEOUT_SECONDS = 15      # per-request timeout
+FETCH_DEADLINE_SECONDS = 30    # overall budget for fetching every feed
+MAX_FETCH_WORKERS = 8          # total concurrent requests
+PER_HOST_CONCURRENCY = 2       # concurrent requests against any single host
+
+# 🗂️ FEED CACHE
+# Feeds are fetched with conditional requests (ETag / Last-Modified) and are
+# not re-requested at all until their minimum refresh interval has passed.
+FEED_DEFAULT_REFRESH_MINUTES = 60   # per-source override: 'refresh_minutes'
+
+# 📥 STREAMING — feeds are parsed while they download and the download stops
+# once enough new (not yet posted) entries have been found.
+FEED_MAX_SCAN_ENTRIES = 50         # give up on a feed after scanning this many entries
+FEED_CHUNK_BYTES = 16 * 1024
+FEED_HASH_PREFIX_BYTES = 32 * 1024 # leading bytes hashed to detect an unchanged feed
+
+REQUEST_HEADERS = {'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'}
+
 # ============================================================================
 # HELPER FUNCTIONS
 # ============================================================================
 
+def _uses_db(filename):
+    # The header stays a plain file so fast_path_check() never opens the DB
+    return STATE_BACKEND == 'sqlite' and os.path.basename(filename) != STATE_HEADER_FILE
+
 def load_json(filename):
-    if os.path.exists(filename):
+    directory, name = os.path.split(filename)
+    default = {} if name in (DAILY_TRACKER_FILE, FEED_CACHE_FILE, SOURCE_STATS_FILE,
+                             POSTING_STATE_FILE, NEAR_DUP_FILE) else []
+    if _uses_db(filename):
+        return get_state_db(directory).load(name, default)
+    return _load_json_file(filename, default)
+
+def _load_json_file(filename, default):
+    if not os.path.exists(filename):
+        return default
+    try:
+        with open(filename, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError) as e:
+        # Writes are atomic (see save_json), so this means the file was edited
+        # or damaged by hand. Keep a copy instead of silently discarding it.
+        backup = filename + '.corrupt'
+        os.replace(filename, backup)
+        print(f"⚠️  Could not read {filename} ({e}); moved it to {backup} and starting fresh")
+        return default
+
+def save_json(filename, data, compact=None):
+    """Write JSON atomically: dump to a temp file, then rename over the target"""
+    if _uses_db(filename):
+        directory, name = os.path.split(filename)
+        get_state_db(directory).save(name, data)
+        return
+    if compact is None:
+        compact = COMPACT_STATE
+    tmp_path = filename + '.tmp'
+    with open(tmp_path, 'w') as f:
+        if compact:
+            json.dump(data, f, separators=(',', ':'))
+        else:
+            json.dump(data, f, indent=2)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, filename)
+
+def nigeria_today_str(now=None):
+    """Today's date in Nigeria time (UTC+1) — the daily limit resets on this"""
+    nigeria_tz = timezone(timedelta(hours=1))
+    return (now or datetime.now(timezone.utc)).astimezone(nigeria_tz).strftime('%Y-%m-%d')
+
+def canonical_url(url):
+    """Normalize a URL for dedup: lowercase scheme/host, drop 'www.', the
+    query string, the fragment and any trailing slash."""
+    parts = urlsplit(url.strip())
+    host = parts.netloc.lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    path = parts.path.rstrip('/') or '/'
+    return urlunsplit((parts.scheme.lower() or 'https', host, path, '', ''))
+
+class PostedStore:
+    """Set-backed index of posted URLs, loaded once per run.
+
+    Membership checks are O(1) on the canonical URL. New posts are appended
+    to POSTED_HISTORY_FILE as one JSON line each instead of rewriting the
+    whole file; entries older than POSTED_RETENTION_DAYS are ignored and
+    dropped by compact().
+    """
+
+    def __init__(self, path=POSTED_HISTORY_FILE, legacy_path=POSTED_URLS_FILE):
+        self.path = path
+        self.posted = {}  # canonical url -> posted_at epoch
+        if os.path.exists(path):
+            self._load()
+        elif legacy_path and os.path.exists(legacy_path):
+            self._migrate(legacy_path)
+
+    def _load(self):
+        with open(self.path, 'r') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    self.posted[record['url']] = record['at']
+                except (ValueError, KeyError, TypeError):
+                    continue  # skip a torn last line rather than losing history
+
+    def _migrate(self, legacy_path):
+        # Straight from the file, whatever STATE_BACKEND is
+        legacy = _load_json_file(legacy_path, None)
+        if not isinstance(legacy, list):
+            return
+        now = time.time()
+        for url in legacy:
+            self.posted[canonical_url(url)] = now
+        self._rewrite()
+        os.remove(legacy_path)
+        print(f"  ✓ Migrated {len(self.posted)} posted URLs to {self.path}")
+
+    def _rewrite(self):
+        tmp_path = self.path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            for url, at in self.posted.items():
+                f.write(json.dumps({'url': url, 'at': at}) + '\n')
+        os.replace(tmp_path, self.path)
+
+    def _cutoff(self, now=None):
+        return (now or time.time()) - POSTED_RETENTION_DAYS * 86400
+
+    def __contains__(self, url):
+        at = self.posted.get(canonical_url(url))
+        return at is not None and at >= self._cutoff()
+
+    def __len__(self):
+        return len(self.posted)
+
+    def add(self, url, when=None):
+        key = canonical_url(url)
+        if key in self:
+            return
+        at = when or time.time()
+        self.posted[key] = at
+        with open(self.path, 'a') as f:
+            f.write(json.dumps({'url': key, 'at': at}) + '\n')
+
+    def compact(self, now=None):
+        """Drop expired entries (and duplicate lines) by rewriting the file once"""
+        cutoff = self._cutoff(now)
+        before = len(self.posted)
+        self.posted = {url: at for url, at in self.posted.items() if at >= cutoff}
+        self._rewrite()
+        return before - len(self.posted)
+
+_posted_stores = {}  # state_dir -> PostedStore
+
+def get_posted_store(state_dir=''):
+    """The per-run PostedStore of the account whose state lives in
+    `state_dir` (loaded from disk on first use)"""
+    store = _posted_stores.get(state_dir)
+    if store is None:
+        if STATE_BACKEND == 'sqlite':
+            store = SQLitePostedStore(get_state_db(state_dir))
+        else:
+            store = PostedStore(path=os.path.join(state_dir, POSTED_HISTORY_FILE),
+                                legacy_path=None if state_dir else POSTED_URLS_FILE)
+        _posted_stores[state_dir] = store
+    return store
+
+def is_unposted(url, stores=None):
+    """True while at least one of `stores` (default: every account's)
+    doesn't have `url`"""
+    if stores is None:
+        stores = [get_posted_store(a['state_dir']) for a in iter_accounts()]
+    return any(url not in store for store in stores)
+
+# ============================================================================
+# METRICS
+# ============================================================================
+
+class RunMetrics:
+    """Timing spans and counters for one run, emitted as one JSON line.
+
+    `with metrics.span('refill'):` adds the block's wall time under that
+    name; spans may nest (a parent includes its children). record() and
+    count() are safe to call from fetch worker threads.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        self.started = time.time()
+        self.spans = {}
+        self.counters = {}
+
+    @contextlib.contextmanager
+    def span(self, name):
+        started = time.perf_counter()
         try:
-            with open(filename, 'r') as f:
-                return json.load(f)
-        except:
-            return {} if filename == DAILY_TRACKER_FILE else []
-    return {} if filename == DAILY_TRACKER_FILE else []
-
-def save_json(filename, data):
-    with open(filename, 'w') as f:
-        json.dump(data, f, indent=2)
-
-def save_posted_url(url):
-    posted = load_json(POSTED_URLS_FILE)
-    if isinstance(posted, list):
-        if url not in posted:
-            posted.append(url)
-            # Keep only last 500 URLs to prevent file from getting too large
-            if len(posted) > 500:
-                posted = posted[-500:]
-            save_json(POSTED_URLS_FILE, posted)
-    else:
-        save_json(POSTED_URLS_FILE, [url])
+            yield
+        finally:
+            self.record(name, time.perf_counter() - started)
+
+    def record(self, name, seconds):
+        with self.lock:
+            self.spans[name] = self.spans.get(name, 0.0) + seconds
+
+    def count(self, name, n=1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def emit(self, mode, path=METRICS_FILE):
+        """Append this run's metrics to `path`, then start a new run"""
+        record = {
+            'at': datetime.fromtimestamp(self.started, timezone.utc).isoformat(timespec='seconds'),
+            'mode': mode,
+            'seconds': round(time.time() - self.started, 3),
+            'spans_ms': {name: round(seconds * 1000, 1) for name, seconds in self.spans.items()},
+            'counters': self.counters,
+        }
+        try:
+            with open(path, 'a') as f:
+                f.write(json.dumps(record) + '\n')
+        except OSError as e:
+            print(f"⚠️  Could not write metrics to {path}: {e}")
+        self.reset()
+
+metrics = RunMetrics()
+
+# ============================================================================
+# STATE JOURNAL (STATE_BACKEND=journal)
+# ============================================================================
+
+class StateJournal:
+    """Append-only log of changes to one account's queue, daily count and
+    posting state, on top of a snapshot kept in their usual JSON files.
+
+    load() reads the snapshot and replays the journal over it. record()
+    diffs the live state against what is already persisted and appends one
+    line per change:
+
+        {"e": "queued",  "post": {...}}
+        {"e": "update",  "url": ..., "set": {...}, "unset": [...]}
+        {"e": "posted",  "url": ...}
+        {"e": "expired", "url": ...}
+        {"e": "counter", "date": ..., "count": ...}
+        {"e": "posting", "state": {...}}
+
+    Past JOURNAL_COMPACT_BYTES, or when a change can't be written as events
+    (a reordered queue, duplicate URLs), compact() rewrites the snapshot and
+    empties the journal. Every event is idempotent, so a crash between those
+    two steps only replays events the snapshot already contains.
+    """
+
+    def __init__(self, state_dir=''):
+        self.state_dir = state_dir
+        self.path = os.path.join(state_dir, STATE_JOURNAL_FILE)
+        self._persisted = None  # copy of (schedule, tracker, posting) as on disk
+
+    def _snapshot_path(self, filename):
+        return os.path.join(self.state_dir, filename)
+
+    def load(self):
+        """(schedule, tracker, posting): the snapshot with the journal replayed"""
+        state = {
+            'schedule': _load_json_file(self._snapshot_path(SCHEDULE_FILE), []),
+            'tracker': _load_json_file(self._snapshot_path(DAILY_TRACKER_FILE), {}),
+            'posting': _load_json_file(self._snapshot_path(POSTING_STATE_FILE), {}),
+        }
+        for field, kind in (('schedule', list), ('tracker', dict), ('posting', dict)):
+            if not isinstance(state[field], kind):
+                state[field] = kind()
+        if os.path.exists(self.path):
+            with open(self.path, 'r') as f:
+                for line in f:
+                    try:
+                        self.apply(state, json.loads(line))
+                    except (ValueError, KeyError, TypeError, AttributeError):
+                        continue  # skip a torn last line
+        self._remember(state['schedule'], state['tracker'], state['posting'])
+        return state['schedule'], state['tracker'], state['posting']
+
+    @staticmethod
+    def apply(state, event):
+        """Replay one event onto {'schedule', 'tracker', 'posting'}"""
+        kind = event['e']
+        if kind == 'queued':
+            if not any(p.get('url') == event['post']['url'] for p in state['schedule']):
+                state['schedule'].append(event['post'])
+        elif kind in ('posted', 'expired'):
+            state['schedule'] = [p for p in state['schedule'] if p.get('url') != event['url']]
+        elif kind == 'update':
+            for post in state['schedule']:
+                if post.get('url') == event['url']:
+                    post.update(event.get('set', {}))
+                    for key in event.get('unset', ()):
+                        post.pop(key, None)
+                    break
+        elif kind == 'counter':
+            state['tracker'] = {'date': event['date'], 'count': event['count']}
+        elif kind == 'posting':
+            state['posting'] = event['state']
+
+    def _remember(self, schedule, tracker, posting):
+        self._persisted = copy.deepcopy((schedule, tracker, posting))
+
+    def diff(self, schedule, tracker, posting, posted=()):
+        """Events that turn the persisted state into the live one, or None
+        when the change can't be expressed as events"""
+        old_schedule, old_tracker, old_posting = self._persisted
+        urls = [p.get('url') for p in schedule]
+        before = {p.get('url'): p for p in old_schedule}
+        if None in urls or len(set(urls)) != len(urls) or len(before) != len(old_schedule):
+            return None
+        events = []
+        live = set(urls)
+        for url in before:
+            if url not in live:
+                events.append({'e': 'posted' if url in posted else 'expired', 'url': url})
+        order = [url for url in before if url in live]
+        for post in schedule:
+            old = before.get(post['url'])
+            if old is None:
+                events.append({'e': 'queued', 'post': post})
+                order.append(post['url'])
+            elif old != post:
+                event = {'e': 'update', 'url': post['url'],
+                         'set': {k: v for k, v in post.items() if k not in old or old[k] != v}}
+                unset = [k for k in old if k not in post]
+                if unset:
+                    event['unset'] = unset
+                events.append(event)
+        if order != urls:
+            return None  # replay appends new posts at the end; anything else needs a snapshot
+
+        if tracker != old_tracker:
+            if not set(tracker) <= {'date', 'count'}:
+                return None
+            events.append({'e': 'counter', 'date': tracker.get('date'), 'count': tracker.get('count', 0)})
+        if posting != old_posting:
+            events.append({'e': 'posting', 'state': posting})
+        return events
+
+    def record(self, schedule, tracker, posting, posted=(), compact=None):
+        """Persist the live state: append its changes, or compact() when the
+        journal is due for it. Returns the number of bytes written."""
+        events = self.diff(schedule, tracker, posting, posted)
+        size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+        if events is None or (events and size >= JOURNAL_COMPACT_BYTES):
+            return self.compact(schedule, tracker, posting, compact=compact)
+        lines = ''.join(json.dumps(e, separators=(',', ':')) + '\n' for e in events)
+        if lines:
+            with open(self.path, 'a') as f:
+                f.write(lines)
+        self._remember(schedule, tracker, posting)
+        return len(lines.encode())
+
+    def compact(self, schedule, tracker, posting, compact=None):
+        """Write the live state as the new snapshot and empty the journal"""
+        written = 0
+        for filename, data in ((SCHEDULE_FILE, schedule), (DAILY_TRACKER_FILE, tracker),
+                               (POSTING_STATE_FILE, posting)):
+            path = self._snapshot_path(filename)
+            save_json(path, data, compact=compact)
+            written += os.path.getsize(path)
+        open(self.path, 'w').close()
+        self._remember(schedule, tracker, posting)
+        return written
+
+# ============================================================================
+# SQLITE BACKEND (STATE_BACKEND=sqlite)
+# ============================================================================
+
+class StateDB:
+    """SQLite home for the state that otherwise lives in JSON files.
+
+    load()/save() take the same filenames as load_json()/save_json():
+    the queue and daily counts get real tables, everything else (feed
+    cache, source stats, ...) is kept as a JSON blob in `kv`. Every save is
+    one transaction; saving the queue only inserts, updates or deletes the
+    rows that changed since it was last loaded or saved. Queue rows are
+    whole items keyed by position; due and expiry lookups run on BotState's
+    in-memory heaps, which is why the queue has no secondary indexes.
+    Posted history lives in `posted` (see SQLitePostedStore).
+    """
+
+    SCHEMA_VERSION = 1
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS queue (
+            seq INTEGER PRIMARY KEY,
+            url TEXT NOT NULL,
+            data TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS posted (
+            url TEXT PRIMARY KEY,
+            at REAL NOT NULL
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS posted_at ON posted (at);
+        CREATE TABLE IF NOT EXISTS daily_counts (
+            date TEXT PRIMARY KEY,
+            count INTEGER NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS kv (
+            name TEXT PRIMARY KEY,
+            data TEXT NOT NULL
+        );
+    """
+
+    def __init__(self, state_dir=''):
+        import sqlite3
+        self.state_dir = state_dir
+        self.path = path = os.path.join(state_dir, STATE_DB_FILE)
+        # Fetch workers check posted history from their own threads
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        with self.conn:
+            self.conn.executescript(self.SCHEMA)
+        self._queue_rows = None  # [(seq, url, data)] as stored, once read
+
+    @property
+    def is_new(self):
+        return self.conn.execute('PRAGMA user_version').fetchone()[0] == 0
+
+    def close(self):
+        """Close the connection; SQLite checkpoints the WAL back into the
+        main file, so only STATE_DB_FILE is left for the workflow to commit."""
+        with self.lock:
+            if self.conn is not None:
+                self.conn.close()
+                self.conn = None
+
+    def load(self, filename, default):
+        with self.lock:
+            if filename == SCHEDULE_FILE:
+                self._queue_rows = self.conn.execute('SELECT seq, url, data FROM queue ORDER BY seq').fetchall()
+                return [json.loads(data) for _, _, data in self._queue_rows]
+            if filename == DAILY_TRACKER_FILE:
+                row = self.conn.execute(
+                    'SELECT date, count FROM daily_counts ORDER BY date DESC LIMIT 1').fetchone()
+                return {'date': row[0], 'count': row[1]} if row else default
+            row = self.conn.execute('SELECT data FROM kv WHERE name = ?', (filename,)).fetchone()
+            return json.loads(row[0]) if row else default
+
+    def save(self, filename, data):
+        with self.lock, self.conn:
+            if filename == SCHEDULE_FILE:
+                self._save_queue(data)
+            elif filename == DAILY_TRACKER_FILE:
+                if data.get('date'):
+                    self.conn.execute('INSERT OR REPLACE INTO daily_counts (date, count) VALUES (?, ?)',
+                                      (data['date'], data.get('count', 0)))
+            else:
+                self.conn.execute('INSERT OR REPLACE INTO kv (name, data) VALUES (?, ?)',
+                                  (filename, json.dumps(data, separators=(',', ':'))))
+
+    def _save_queue(self, posts):
+        """Per-row writes: rows keep their seq while the queue only loses
+        items, changes them in place, or gains new ones at the end (every
+        normal run); anything else (reordering, duplicate URLs) rewrites the
+        table."""
+        if self._queue_rows is None:
+            self._queue_rows = self.conn.execute('SELECT seq, url, data FROM queue ORDER BY seq').fetchall()
+        old = {url: (seq, data) for seq, url, data in self._queue_rows}
+        new = [(post.get('url', ''), json.dumps(post, separators=(',', ':'))) for post in posts]
+        next_seq = max((seq for seq, _, _ in self._queue_rows), default=0) + 1
+        rows, updates, inserts = [], [], []
+        in_order = len(old) == len(self._queue_rows) and len({url for url, _ in new}) == len(new)
+        for url, data in new:
+            if not in_order:
+                break
+            hit = old.get(url)
+            if hit is None:
+                seq = next_seq
+                next_seq += 1
+                inserts.append((seq, url, data))
+            elif inserts or (rows and hit[0] < rows[-1][0]):
+                in_order = False  # an existing row moved
+                break
+            else:
+                seq = hit[0]
+                if hit[1] != data:
+                    updates.append((seq, url, data))
+            rows.append((seq, url, data))
+
+        if not in_order:
+            self.conn.execute('DELETE FROM queue')
+            rows = inserts = [(seq, url, data) for seq, (url, data) in enumerate(new, 1)]
+            updates = []
+        else:
+            kept = {seq for seq, _, _ in rows}
+            self.conn.executemany('DELETE FROM queue WHERE seq = ?',
+                                  [(seq,) for seq, _, _ in self._queue_rows if seq not in kept])
+        self.conn.executemany('UPDATE queue SET url = ?, data = ? WHERE seq = ?',
+                              [(url, data, seq) for seq, url, data in updates])
+        self.conn.executemany('INSERT INTO queue (url, data, seq) VALUES (?, ?, ?)',
+                              [(url, data, seq) for seq, url, data in inserts])
+        self._queue_rows = rows
+
+    def migrate_from_json(self):
+        """Import existing JSON state files and posted history (runs once)"""
+        imported = []
+        for filename in (SCHEDULE_FILE, DAILY_TRACKER_FILE, POSTING_STATE_FILE,
+                         FEED_CACHE_FILE, SOURCE_STATS_FILE):
+            path = os.path.join(self.state_dir, filename)
+            if os.path.exists(path):
+                data = _load_json_file(path, None)
+                if data is not None:
+                    self.save(filename, data)
+                    imported.append(filename)
+        journal = StateJournal(self.state_dir)
+        if os.path.exists(journal.path):
+            # Coming from the journal backend: the files above are only its snapshot
+            for filename, data in zip((SCHEDULE_FILE, DAILY_TRACKER_FILE, POSTING_STATE_FILE), journal.load()):
+                self.save(filename, data)
+            imported.append(STATE_JOURNAL_FILE)
+        near_dup_paths = (os.path.join(self.state_dir, NEAR_DUP_FILE),
+                          os.path.join(self.state_dir, NEAR_DUP_LEGACY_FILE))
+        signatures, _ = NearDupIndex.read_log(*near_dup_paths)
+        if signatures:
+            self.save(NEAR_DUP_FILE, signatures)
+            imported.append(NEAR_DUP_FILE)
+        # Read straight into the table: PostedStore's own legacy migration
+        # would write a posted_history.jsonl that then goes stale
+        history_path = os.path.join(self.state_dir, POSTED_HISTORY_FILE)
+        legacy_path = None if self.state_dir else POSTED_URLS_FILE
+        posted = PostedStore(path=history_path, legacy_path=None).posted
+        legacy = _load_json_file(legacy_path, None) if legacy_path and not posted else None
+        if isinstance(legacy, list):
+            now = time.time()
+            posted = {canonical_url(url): now for url in legacy}
+        with self.lock, self.conn:
+            self.conn.executemany('INSERT OR REPLACE INTO posted (url, at) VALUES (?, ?)', posted.items())
+            self.conn.execute(f'PRAGMA user_version = {self.SCHEMA_VERSION}')
+        # The table is the history now; leftover files would be committed stale
+        for path in (history_path, legacy_path) + near_dup_paths:
+            if path and os.path.exists(path):
+                os.remove(path)
+        if imported or posted:
+            print(f"  ✓ Migrated {', '.join(imported) or 'no state files'} and "
+                  f"{len(posted)} posted URLs into {self.path}")
+
+class SQLitePostedStore:
+    """PostedStore backed by StateDB's `posted` table.
+
+    Lookups hit the primary-key index instead of loading the whole history
+    into memory, so history is never truncated: entries older than
+    POSTED_RETENTION_DAYS stay on record but no longer block a repost.
+    """
+
+    def __init__(self, db):
+        self.db = db
+
+    def _cutoff(self, now=None):
+        return (now or time.time()) - POSTED_RETENTION_DAYS * 86400
+
+    def __contains__(self, url):
+        with self.db.lock:
+            row = self.db.conn.execute('SELECT at FROM posted WHERE url = ?',
+                                       (canonical_url(url),)).fetchone()
+        return row is not None and row[0] >= self._cutoff()
+
+    def __len__(self):
+        with self.db.lock:
+            return self.db.conn.execute('SELECT COUNT(*) FROM posted').fetchone()[0]
+
+    def add(self, url, when=None):
+        # Re-posting after the retention window refreshes the timestamp
+        with self.db.lock, self.db.conn:
+            self.db.conn.execute(
+                'INSERT INTO posted (url, at) VALUES (?, ?) '
+                'ON CONFLICT (url) DO UPDATE SET at = excluded.at WHERE posted.at < ?',
+                (canonical_url(url), when or time.time(), self._cutoff()))
+
+    def compact(self, now=None):
+        """Nothing to drop — history is kept; see the class docstring"""
+        return 0
+
+_state_dbs = {}  # state_dir -> StateDB
+
+def get_state_db(state_dir=''):
+    """The per-run StateDB for `state_dir` (opened, and migrated if new,
+    on first use)"""
+    db = _state_dbs.get(state_dir)
+    if db is None:
+        # Registered before migrating, so anything the migration loads
+        # through load_json() finds this DB instead of opening another
+        db = _state_dbs[state_dir] = StateDB(state_dir)
+        atexit.register(db.close)
+        if db.is_new:
+            db.migrate_from_json()
+    return db
+
+# ============================================================================
+# ACCOUNTS
+# ============================================================================
+
+def iter_accounts(accounts=None):
+    """Registry entries with ACCOUNT_DEFAULTS, DAILY_LIMIT and
+    ALLOWED_HOURS_UTC filled in"""
+    resolved = []
+    for i, account in enumerate(ACCOUNTS if accounts is None else accounts):
+        account = {**ACCOUNT_DEFAULTS, **account}
+        if account['state_dir'] is None:
+            account['state_dir'] = '' if i == 0 else os.path.join('accounts', account['name'])
+        if account['daily_limit'] is None:
+            account['daily_limit'] = DAILY_LIMIT
+        if account['allowed_hours_utc'] is None:
+            account['allowed_hours_utc'] = ALLOWED_HOURS_UTC
+        resolved.append(account)
+    state_dirs = [a['state_dir'] for a in resolved]
+    if len(set(state_dirs)) != len(state_dirs):
+        raise ValueError("every account in ACCOUNTS needs its own state_dir")
+    return resolved
 
-def authenticate_twitter():
+def account_accepts(account, opp):
+    """Whether `opp` belongs in this account's queue"""
+    if account['types'] is not None and opp['type'] not in account['types']:
+        return False
+    if account['locations'] is not None and not any(l in opp['location'] for l in account['locations']):
+        return False
+    return True
+
+def interested_stores(source, title):
+    """PostedStores of the accounts that would queue an entry titled
+    `title` from `source` (its type and location are known before extraction)"""
+    opp = {'type': source['type'], 'location': classify_location(source, title)}
+    return [get_posted_store(a['state_dir']) for a in iter_accounts() if account_accepts(a, opp)]
+
+def route_opportunities(opportunities, accounts):
+    """{account name: [opportunity, ...]} — an opportunity goes to every
+    account that accepts it"""
+    return {a['name']: [opp for opp in opportunities if account_accepts(a, opp)] for a in accounts}
+
+_clients = {}  # account name -> authenticated client, cached for the run
+
+def get_client(account):
+    """The account's X client, authenticated on first use"""
+    client = _clients.get(account['name'])
+    if client is None:
+        client = authenticate_twitter(account)
+        if client:
+            _clients[account['name']] = client
+    return client
+
+class BotState:
+    """All mutable bot state for one run, loaded once and flushed once.
+
+    Functions mutate `schedule` / `tracker` in memory and call mark_dirty();
+    flush() then writes only the dirty files, each atomically (or, with the
+    journal backend, appends what changed to the StateJournal). Posted URLs
+    live in the append-only PostedStore and need no flush.
+    """
+
+    FILES = {'schedule': SCHEDULE_FILE, 'tracker': DAILY_TRACKER_FILE, 'posting': POSTING_STATE_FILE}
+
+    def __init__(self, account=None, compact=None, clock=time.time):
+        self.account = account or iter_accounts()[0]
+        self.clock = clock  # epoch seconds; the daemon's tests inject a fake one
+        self.name = self.account['name']
+        self.daily_limit = self.account['daily_limit']
+        self.allowed_hours = self.account['allowed_hours_utc']
+        if self.account['state_dir']:
+            os.makedirs(self.account['state_dir'], exist_ok=True)
+        self.compact = COMPACT_STATE if compact is None else compact
+        self.journal = StateJournal(self.account['state_dir']) if STATE_BACKEND == 'journal' else None
+        if self.journal is not None:
+            self.schedule, self.tracker, self.posting = self.journal.load()
+        else:
+            self.schedule = load_json(self.path(SCHEDULE_FILE))
+            if not isinstance(self.schedule, list):
+                self.schedule = []
+            self.tracker = load_json(self.path(DAILY_TRACKER_FILE))
+            if not isinstance(self.tracker, dict):
+                self.tracker = {}
+            self.posting = load_json(self.path(POSTING_STATE_FILE))
+            if not isinstance(self.posting, dict):
+                self.posting = {}
+        self.posted = get_posted_store(self.account['state_dir'])
+        self._dirty = set()
+        self._due = None     # min-heap of (scheduled epoch, seq, post), built lazily
+        self._expiry = None  # min-heap of (added epoch, seq, post), built lazily
+        self._best = None    # min-heap of (-score, seq, post), built lazily
+        self._seq = itertools.count()
+        self._slots = None
+        self._near_dups = None
+        self.recover_pending()
+
+    def path(self, filename):
+        """Where this account keeps `filename`"""
+        return os.path.join(self.account['state_dir'], filename)
+
+    def now(self):
+        return datetime.fromtimestamp(self.clock(), timezone.utc)
+
+    def mark_dirty(self, field):
+        self._dirty.add(field)
+
+    @property
+    def slots(self):
+        """SlotAllocator over the current queue, shared by every refill this run"""
+        if self._slots is None:
+            self._slots = SlotAllocator(self.schedule, now=self.now(), hours=self.allowed_hours)
+        return self._slots
+
+    @property
+    def near_dups(self):
+        """NearDupIndex of queued/posted items, loaded on first use"""
+        if self._near_dups is None:
+            self._near_dups = NearDupIndex(path=self.path(NEAR_DUP_FILE),
+                                           legacy_path=self.path(NEAR_DUP_LEGACY_FILE))
+        return self._near_dups
+
+    def set_schedule(self, schedule):
+        self.schedule = schedule
+        self._due = self._expiry = self._best = None
+        self.mark_dirty('schedule')
+
+    def enqueue(self, posts):
+        self.schedule.extend(posts)
+        for post in posts:
+            if self._due is not None:
+                self._push_due(post)
+            if self._expiry is not None:
+                self._push_expiry(post)
+            if self._best is not None:
+                heapq.heappush(self._best, self._best_entry(post))
+        self.mark_dirty('schedule')
+
+    def evict(self, post):
+        """Remove a just-posted item from the queue (its heap entries are
+        skipped lazily, since it's marked posted)"""
+        for i, queued in enumerate(self.schedule):
+            if queued is post:
+                del self.schedule[i]
+                self.mark_dirty('schedule')
+                return
+
+    def recover_pending(self):
+        """A 'pending' marker means a run died inside create_tweet, so the
+        tweet may be live: count it as sent so it is never tweeted twice.
+        Its URL goes into the posted store even if the item has since
+        expired from the queue, or the next refill would queue it again."""
+        pending = self.posting.get('pending')
+        if not pending:
+            return
+        url = pending.get('url')
+        print(f"⚠️  Previous run stopped mid-post for {url} — "
+              "counting it as sent so it is never tweeted twice.")
+        started = parse_iso_epoch(pending.get('started_at'), default=self.clock())
+        if url:
+            self.posted.add(url, when=started)
+        for post in self.schedule:
+            if post.get('url') == url and not post.get('posted', False):
+                post['posted'] = True
+                post['posted_at'] = pending.get('started_at')
+                self.evict(post)
+                break
+        if nigeria_today_str(datetime.fromtimestamp(started, timezone.utc)) == nigeria_today_str(self.now()):
+            increment_daily_count(self)
+        self.posting.pop('pending', None)
+        self.mark_dirty('posting')
+
+    @staticmethod
+    def _due_epoch(post):
+        return parse_iso_epoch(post.get('scheduled_time'), default=0.0)
+
+    def _due_entry(self, post):
+        return (self._due_epoch(post), next(self._seq), post)
+
+    def _push_due(self, post):
+        heapq.heappush(self._due, self._due_entry(post))
+
+    def _expiry_entry(self, post):
+        added = post.get('added_epoch') or parse_iso_epoch(post.get('added_at'))
+        # Unparseable added_at: never judged stale
+        return None if added is None else (added, next(self._seq), post)
+
+    def _push_expiry(self, post):
+        entry = self._expiry_entry(post)
+        if entry is not None:
+            heapq.heappush(self._expiry, entry)
+
+    def _best_entry(self, post):
+        return (-post.get('score', 0.0), next(self._seq), post)
+
+    @staticmethod
+    def _peek(heap):
+        """Smallest (key, seq, post) whose post is still unposted"""
+        while heap and heap[0][2].get('posted', False):
+            heapq.heappop(heap)
+        return heap[0] if heap else None
+
+    def _peek_due(self):
+        """Like _peek, also dropping entries left behind when claim_slot()
+        moved a post to another scheduled_time"""
+        heap = self._due_heap()
+        while self._peek(heap) and heap[0][0] != self._due_epoch(heap[0][2]):
+            heapq.heappop(heap)
+        return heap[0] if heap else None
+
+    def _due_heap(self):
+        if self._due is None:
+            self._due = [self._due_entry(p) for p in self.schedule if not p.get('posted', False)]
+            heapq.heapify(self._due)
+        return self._due
+
+    def _expiry_heap(self):
+        if self._expiry is None:
+            entries = (self._expiry_entry(p) for p in self.schedule if not p.get('posted', False))
+            self._expiry = [entry for entry in entries if entry is not None]
+            heapq.heapify(self._expiry)
+        return self._expiry
+
+    def _best_heap(self):
+        if self._best is None:
+            self._best = [self._best_entry(p) for p in self.schedule if not p.get('posted', False)]
+            heapq.heapify(self._best)
+        return self._best
+
+    def next_due_post(self, now=None):
+        """The unposted item with the earliest scheduled_time that is <= now
+        (or None). O(log n) per call; posted items are dropped lazily."""
+        now_epoch = now.timestamp() if now else self.clock()
+        head = self._peek_due()
+        return head[2] if head and head[0] <= now_epoch else None
+
+    def claim_slot(self, post):
+        """Hand the slot `post` is due in to the best-scored unposted item and
+        return that item (O(log n)). The two swap scheduled_times, so `post`
+        waits in the slot the winner held."""
+        head = self._peek(self._best_heap())
+        best = head[2] if head else post
+        if best is not post:
+            post['scheduled_time'], best['scheduled_time'] = best['scheduled_time'], post['scheduled_time']
+            self._push_due(post)
+            self._push_due(best)
+            self.mark_dirty('schedule')
+        return best
+
+    def expire(self, now=None, max_age_hours=MAX_QUEUE_AGE_HOURS):
+        """Drop unposted items added more than max_age_hours ago and return
+        them. Only pops heap entries that are past the cutoff; the queue is
+        rewritten only if something actually expired."""
+        cutoff = (now or self.clock()) - max_age_hours * 3600
+        heap = self._expiry_heap()
+        expired = []
+        while self._peek(heap) and heap[0][0] < cutoff:
+            expired.append(heapq.heappop(heap)[2])
+        if expired:
+            gone = {id(post) for post in expired}
+            self.schedule = [p for p in self.schedule if id(p) not in gone]
+            self._due = self._best = None
+            self.mark_dirty('schedule')
+        return expired
+
+    @property
+    def dirty(self):
+        return set(self._dirty)
+
+    def header(self):
+        """Just enough state for fast_path_check() to decide whether a run
+        has anything to do without loading the queue."""
+        due = self._peek_due()
+        expiry = self._peek(self._expiry_heap())
+        return {
+            'date': self.tracker.get('date'),
+            'count': self.tracker.get('count', 0),
+            'queue': sum(1 for p in self.schedule if not p.get('posted', False)),
+            'next_due': due[0] if due else None,
+            'next_expiry': expiry[0] + MAX_QUEUE_AGE_HOURS * 3600 if expiry else None,
+            'rate_limited_until': self.posting.get('rate_limit_reset'),
+        }
+
+    def flush(self):
+        if self.journal is not None:
+            if self._dirty:
+                self.journal.record(self.schedule, self.tracker, self.posting,
+                                    posted=self.posted, compact=self.compact)
+        else:
+            for field in sorted(self._dirty):
+                save_json(self.path(self.FILES[field]), getattr(self, field), compact=self.compact)
+        flushed = len(self._dirty)
+        if self._near_dups is not None and self._near_dups.dirty:
+            self._near_dups.save()
+            flushed += 1
+        if flushed or not os.path.exists(self.path(STATE_HEADER_FILE)):
+            save_json(self.path(STATE_HEADER_FILE), self.header(), compact=True)
+        self._dirty.clear()
+        return flushed
+
+def authenticate_twitter(account=None):
+    import tweepy
+    prefix = account['env_prefix'] if account else ''
+    if prefix:
+        keys = [os.getenv(prefix + name) for name in ('API_KEY', 'API_SECRET', 'ACCESS_TOKEN', 'ACCESS_TOKEN_SECRET')]
+    else:
+        keys = [API_KEY, API_SECRET, ACCESS_TOKEN, ACCESS_TOKEN_SECRET]
     try:
         client = tweepy.Client(
-            consumer_key=API_KEY,
-            consumer_secret=API_SECRET,
-            access_token=ACCESS_TOKEN,
-            access_token_secret=ACCESS_TOKEN_SECRET
+            consumer_key=keys[0],
+            consumer_secret=keys[1],
+            access_token=keys[2],
+            access_token_secret=keys[3]
         )
         print("✓ Successfully authenticated with X API")
         return client
@@ -92,7 +1133,7 @@ def authenticate_twitter():
 # DAILY CLEANUP & DATA MANAGEMENT
 # ============================================================================
 
-def cleanup_old_data():
+def cleanup_old_data(state):
     """Clean up old data when it's a new day.
 
     IMPORTANT: Freshness of queued posts is judged by `added_at` (when the
@@ -102,11 +1143,8 @@ def cleanup_old_data():
     were queued. Now a post only gets dropped once it's actually stale
     (older than MAX_QUEUE_AGE_HOURS), regardless of which day it is.
     """
-    tracker = load_json(DAILY_TRACKER_FILE)
-    
-    # Get Nigeria time (UTC+1)
-    nigeria_tz = timezone(timedelta(hours=1))
-    today_str = datetime.now(nigeria_tz).strftime('%Y-%m-%d')
+    tracker = state.tracker
+    today_str = nigeria_today_str(state.now())
     
     is_new_day = (not tracker or tracker.get('date') != today_str)
 
@@ -115,53 +1153,35 @@ def cleanup_old_data():
         print("🧹 Cleaning up old data...")
         
         # 1. Reset daily tracker
-        tracker = {'date': today_str, 'count': 0}
-        save_json(DAILY_TRACKER_FILE, tracker)
+        state.tracker = tracker = {'date': today_str, 'count': 0}
+        state.mark_dirty('tracker')
 
     # 2. Prune the schedule by FRESHNESS, every run (not just on day change).
-    #    - Already-posted items are dropped (no longer needed).
     #    - Unposted items older than MAX_QUEUE_AGE_HOURS are dropped (stale).
+    #      The expiry heap only pops items that are actually past the cutoff,
+    #      so this costs nothing when nothing has gone stale.
+    #    - Posted items leave the queue as soon as they're posted; anything
+    #      left over from older state files is swept once a day.
     #    - Everything else survives, even across a day boundary.
-    schedule = load_json(SCHEDULE_FILE)
-    if isinstance(schedule, list):
-        now_utc = datetime.now(timezone.utc)
-        cleaned_schedule = []
-        dropped_stale = 0
-        dropped_posted = 0
+    before = len(state.schedule)
+    dropped_stale = len(state.expire())
+    dropped_posted = 0
+    if is_new_day:
+        unposted = [p for p in state.schedule if not p.get('posted', False)]
+        dropped_posted = len(state.schedule) - len(unposted)
+        if dropped_posted:
+            state.set_schedule(unposted)
 
-        for post in schedule:
-            if post.get('posted', False):
-                dropped_posted += 1
-                continue
+    if dropped_stale or dropped_posted:
+        print(f"  ✓ Scheduled posts: {before} → {len(state.schedule)} "
+              f"(dropped {dropped_posted} posted, {dropped_stale} stale >{MAX_QUEUE_AGE_HOURS}h)")
 
-            added_at_str = post.get('added_at')
-            if added_at_str:
-                try:
-                    added_at = datetime.fromisoformat(added_at_str.replace('Z', '+00:00'))
-                    age_hours = (now_utc - added_at).total_seconds() / 3600
-                    if age_hours > MAX_QUEUE_AGE_HOURS:
-                        dropped_stale += 1
-                        continue
-                except Exception:
-                    # If we can't parse it, don't silently keep junk forever —
-                    # but don't nuke it on a parse hiccup either. Keep it once;
-                    # it'll get judged again next run.
-                    pass
-
-            cleaned_schedule.append(post)
-
-        if len(cleaned_schedule) != len(schedule):
-            save_json(SCHEDULE_FILE, cleaned_schedule)
-            print(f"  ✓ Scheduled posts: {len(schedule)} → {len(cleaned_schedule)} "
-                  f"(dropped {dropped_posted} posted, {dropped_stale} stale >{MAX_QUEUE_AGE_HOURS}h)")
-
-    # 3. Trim posted URLs list (keep last 500) — only needs to happen once a day
+    # 3. Compact the posted-URL history (drop entries past the retention
+    #    window) — only needs to happen once a day
     if is_new_day:
-        posted_urls = load_json(POSTED_URLS_FILE)
-        if isinstance(posted_urls, list) and len(posted_urls) > 500:
-            posted_urls = posted_urls[-500:]
-            save_json(POSTED_URLS_FILE, posted_urls)
-            print(f"  ✓ Posted URLs trimmed to {len(posted_urls)}")
+        expired = state.posted.compact(now=state.clock())
+        print(f"  ✓ Posted URL history compacted ({expired} expired, "
+              f"{len(state.posted)} kept for {POSTED_RETENTION_DAYS}d)")
         
         print("✅ New day cleanup completed!")
     
@@ -171,281 +1191,1239 @@ def cleanup_old_data():
 # CHECKERS: TIME & LIMITS
 # ============================================================================
 
-def is_posting_hour():
+def is_posting_hour(hours=None):
     """Checks if the current hour is in our allowed schedule"""
+    hours = ALLOWED_HOURS_UTC if hours is None else hours
     current_hour_utc = datetime.now(timezone.utc).hour
     
-    if current_hour_utc in ALLOWED_HOURS_UTC:
+    if current_hour_utc in hours:
         print(f"✅ Current UTC Hour ({current_hour_utc}) is in allowed schedule.")
         return True
     else:
         print(f"⏳ Current UTC Hour ({current_hour_utc}) is NOT in allowed schedule.")
-        print(f"   Allowed UTC hours: {ALLOWED_HOURS_UTC}")
+        print(f"   Allowed UTC hours: {hours}")
         print("   Script will run maintenance (scraping) but will NOT post.")
         return False
 
-def check_daily_limit():
+def check_daily_limit(state):
     """Returns True if we are allowed to post, False if limit reached"""
-    tracker = load_json(DAILY_TRACKER_FILE)
-    
-    # Get Nigeria time (UTC+1)
-    nigeria_tz = timezone(timedelta(hours=1))
-    today_str = datetime.now(nigeria_tz).strftime('%Y-%m-%d')
+    tracker = state.tracker
+    today_str = nigeria_today_str(state.now())
     
     # Reset if new day
     if not tracker or tracker.get('date') != today_str:
         print(f"🔄 New day detected ({today_str}). Resetting counter to 0.")
-        tracker = {'date': today_str, 'count': 0}
-        save_json(DAILY_TRACKER_FILE, tracker)
+        state.tracker = {'date': today_str, 'count': 0}
+        state.mark_dirty('tracker')
         return True
     
     current_count = tracker.get('count', 0)
-    print(f"📊 Daily Stats: {current_count}/{DAILY_LIMIT} posted today.")
+    print(f"📊 Daily Stats: {current_count}/{state.daily_limit} posted today.")
     
-    if current_count >= DAILY_LIMIT:
+    if current_count >= state.daily_limit:
         print("🛑 Daily limit reached! Skipping post.")
         return False
         
     return True
 
-def increment_daily_count():
+def increment_daily_count(state):
     """Increment the daily post count"""
-    tracker = load_json(DAILY_TRACKER_FILE)
-    
-    # Get Nigeria time (UTC+1)
-    nigeria_tz = timezone(timedelta(hours=1))
-    today_str = datetime.now(nigeria_tz).strftime('%Y-%m-%d')
+    tracker = state.tracker
+    today_str = nigeria_today_str(state.now())
     
     # Reset if it's a new day
     if not tracker or tracker.get('date') != today_str:
-        tracker = {'date': today_str, 'count': 1}
+        state.tracker = tracker = {'date': today_str, 'count': 1}
     else:
         tracker['count'] = tracker.get('count', 0) + 1
     
-    save_json(DAILY_TRACKER_FILE, tracker)
+    state.mark_dirty('tracker')
     print(f"📈 Incremented daily count to {tracker['count']}")
 
+# ============================================================================
+# CONCURRENT FEED FETCHING
+# ============================================================================
+
+_http_session = None
+_host_limits = {}
+_host_limits_lock = threading.Lock()
+
+def get_http_session():
+    """Shared requests session so every feed reuses pooled connections"""
+    global _http_session
+    if _http_session is None:
+        import requests
+        import requests.adapters
+        session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_connections=MAX_FETCH_WORKERS,
+                                                pool_maxsize=MAX_FETCH_WORKERS)
+        session.mount('http://', adapter)
+        session.mount('https://', adapter)
+        session.headers.update(REQUEST_HEADERS)
+        _http_session = session
+    return _http_session
+
+def _host_semaphore(url):
+    host = urlsplit(url).netloc.lower()
+    with _host_limits_lock:
+        if host not in _host_limits:
+            _host_limits[host] = threading.BoundedSemaphore(PER_HOST_CONCURRENCY)
+        return _host_limits[host]
+
+def _check_deadline(deadline_at):
+    if time.monotonic() > deadline_at:
+        raise TimeoutError("fetch deadline exceeded")
+
+def _stream_feed(url, deadline_at, conditional_headers, known_hash, limit, accept):
+    """Fetch worker: stream one feed and parse it as it downloads.
+
+    Returns (response, prefix hash, entries, bytes read). `entries` is None
+    when the feed is unchanged (304, or same leading bytes as last time);
+    otherwise it holds at most `limit` entries accepted by `accept`, and the
+    download stops as soon as they've been found.
+    """
+    import hashlib
+    from xml.etree.ElementTree import ParseError
+
+    with _host_semaphore(url):
+        remaining = deadline_at - time.monotonic()
+        if remaining <= 0:
+            raise TimeoutError("fetch deadline exceeded before request started")
+        response = get_http_session().get(url, headers=conditional_headers, stream=True,
+                                          timeout=min(FEED_TIMEOUT_SECONDS, remaining))
+        try:
+            if response.status_code == 304:
+                return response, known_hash, None, 0
+            response.raise_for_status()
+
+            # New items are added at the top of a feed, so hashing the first
+            # FEED_HASH_PREFIX_BYTES is enough to tell whether it changed.
+            chunks = response.iter_content(FEED_CHUNK_BYTES)
+            head = b''
+            for chunk in chunks:
+                head += chunk
+                if len(head) >= FEED_HASH_PREFIX_BYTES:
+                    break
+                _check_deadline(deadline_at)
+            digest = hashlib.sha256(head[:FEED_HASH_PREFIX_BYTES]).hexdigest()
+            if digest == known_hash:
+                return response, digest, None, len(head)
+
+            received = [head]
+            def stream():
+                yield head
+                for chunk in chunks:
+                    _check_deadline(deadline_at)
+                    received.append(chunk)
+                    yield chunk
+
+            entries = []
+            try:
+                for scanned, entry in enumerate(iter_feed_entries(stream()), start=1):
+                    if accept(url, entry):
+                        entries.append(entry)
+                    if len(entries) >= limit or scanned >= FEED_MAX_SCAN_ENTRIES:
+                        break
+            except ParseError:
+                # Not well-formed XML: read the rest and let feedparser cope
+                import feedparser
+                for chunk in chunks:
+                    _check_deadline(deadline_at)
+                    received.append(chunk)
+                parsed = feedparser.parse(b''.join(received))
+                candidates = map(_entry_from_feedparser, parsed.entries[:FEED_MAX_SCAN_ENTRIES])
+                entries = [e for e in candidates if accept(url, e)][:limit]
+            return response, digest, entries, sum(len(c) for c in received)
+        finally:
+            response.close()
+
+def feed_refresh_minutes(url):
+    for source in iter_sources():
+        if source['url'] == url and source['refresh_minutes'] is not None:
+            return source['refresh_minutes']
+    return FEED_DEFAULT_REFRESH_MINUTES
+
+def _feed_is_fresh(url, entry, now):
+    """True if the feed was fetched recently enough that we shouldn't ask again"""
+    fetched_at = entry.get('fetched_at')
+    if not fetched_at:
+        return False
+    return now - fetched_at < feed_refresh_minutes(url) * 60
+
+def _conditional_headers(entry):
+    headers = {}
+    if entry.get('etag'):
+        headers['If-None-Match'] = entry['etag']
+    if entry.get('last_modified'):
+        headers['If-Modified-Since'] = entry['last_modified']
+    return headers
+
+def _timed(fn, *args):
+    started = time.monotonic()
+    try:
+        return fn(*args), time.monotonic() - started
+    except Exception as e:
+        e.elapsed = time.monotonic() - started
+        raise
+
+def fetch_feeds(urls, deadline=FETCH_DEADLINE_SECONDS, use_cache=True, limits=None, filters=None, report=None):
+    """Stream every feed URL in parallel and return {url: [entry, ...]}.
+
+    Each feed stops downloading once it has yielded limits[url] entries
+    that pass filters[url] (default: is_new_entry, i.e. not posted yet).
+    A feed maps to None when there is nothing new to parse: it failed, hit
+    the overall deadline, is still inside its minimum refresh interval,
+    answered 304 Not Modified, or starts with the same bytes as last time.
+    If `report` is a dict it receives {url: {'status', 'seconds', 'bytes',
+    'error'}} for every URL.
+    """
+    from concurrent.futures import ThreadPoolExecutor, wait
+
+    urls = list(dict.fromkeys(urls))
+    results = {url: None for url in urls}
+    if not urls:
+        return results
+    limits = limits or {}
+    filters = filters or {}
+    report = {} if report is None else report
+    # Load every account's history before the workers start reading it
+    for account in iter_accounts():
+        get_posted_store(account['state_dir'])
+
+    cache = load_json(FEED_CACHE_FILE) if use_cache else {}
+    if not isinstance(cache, dict): cache = {}
+    now = time.time()
+
+    to_fetch = []
+    for url in urls:
+        entry = cache.get(url, {})
+        if use_cache and _feed_is_fresh(url, entry, now):
+            print(f"  💤 {url} refreshed <{feed_refresh_minutes(url)}m ago, skipping")
+            report[url] = {'status': 'fresh', 'seconds': 0.0, 'bytes': 0, 'error': None}
+        else:
+            to_fetch.append(url)
+
+    deadline_at = time.monotonic() + deadline
+    started = time.monotonic()
+    unchanged = 0
+    bytes_read = 0
+    if to_fetch:
+        executor = ThreadPoolExecutor(max_workers=min(MAX_FETCH_WORKERS, len(to_fetch)))
+        try:
+            futures = {}
+            for url in to_fetch:
+                cached = cache.get(url, {}) if use_cache else {}
+                futures[executor.submit(_timed, _stream_feed, url, deadline_at, _conditional_headers(cached),
+                                        cached.get('prefix_hash'), limits.get(url, FEED_MAX_SCAN_ENTRIES),
+                                        filters.get(url, is_new_entry))] = url
+            done, not_done = wait(futures, timeout=deadline)
+            for future in done:
+                url = futures[future]
+                try:
+                    (response, digest, entries, size), elapsed = future.result()
+                except Exception as e:
+                    print(f"  ✗ Error fetching {url}: {e}")
+                    report[url] = {'status': 'failed', 'seconds': getattr(e, 'elapsed', 0.0), 'bytes': 0,
+                                   'error': str(e)[:200]}
+                    continue
+
+                bytes_read += size
+                report[url] = {'status': 'unchanged' if entries is None else 'changed',
+                               'seconds': elapsed, 'bytes': size, 'error': None}
+                entry = cache.setdefault(url, {})
+                entry['fetched_at'] = now
+                entry['prefix_hash'] = digest
+                if response.status_code != 304:
+                    entry['etag'] = response.headers.get('ETag')
+                    entry['last_modified'] = response.headers.get('Last-Modified')
+                if entries is None:
+                    unchanged += 1
+                    continue
+                results[url] = entries
+            for future in not_done:
+                print(f"  ✗ Timed out fetching {futures[future]} (deadline {deadline}s)")
+                report[futures[future]] = {'status': 'failed', 'seconds': float(deadline), 'bytes': 0,
+                                           'error': f'deadline {deadline}s exceeded'}
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    if use_cache:
+        save_json(FEED_CACHE_FILE, cache)
+
+    changed = sum(1 for entries in results.values() if entries is not None)
+    print(f"  ⚡ Feeds: {changed} changed, {unchanged} unchanged, "
+          f"{len(urls) - len(to_fetch)} skipped (fresh), {bytes_read / 1024:.0f} KB read "
+          f"in {time.monotonic() - started:.1f}s")
+    return results
+
+# ============================================================================
+# STREAMING FEED PARSER
+# ============================================================================
+
+ENTRY_TAGS = ('item', 'entry')  # RSS 0.9x/1.0/2.0 and Atom, matched by local name
+
+def _local_name(tag):
+    return tag.rsplit('}', 1)[-1]
+
+def _entry_from_element(elem):
+    """Flatten an <item>/<entry> element into the entry dict used by the scrapers"""
+    fields = {}
+    link = ''
+    for child in elem:
+        name = _local_name(child.tag)
+        if name == 'link':
+            href = child.get('href')
+            if href is None:
+                link = link or (child.text or '').strip()
+            elif not link and child.get('rel', 'alternate') == 'alternate':
+                link = href.strip()  # Atom
+        elif name not in fields:
+            fields[name] = ''.join(child.itertext())
+    html_text = (fields.get('encoded') or fields.get('content') or fields.get('summary')
+                 or fields.get('description') or '')
+    published = fields.get('pubDate') or fields.get('published') or fields.get('updated') or fields.get('date')
+    return {'title': fields.get('title', ''), 'link': link, 'html': html_text, 'published': published}
+
+def _entry_from_feedparser(entry):
+    raw_html = ""
+    if hasattr(entry, 'content'): raw_html = entry.content[0].value
+    elif hasattr(entry, 'summary'): raw_html = entry.summary
+    elif hasattr(entry, 'description'): raw_html = entry.description
+    return {'title': entry.get('title', ''), 'link': entry.get('link', ''), 'html': raw_html,
+            'published': entry.get('published') or entry.get('updated')}
+
+def iter_feed_entries(chunks):
+    """Incrementally parse an RSS/Atom byte stream, yielding each entry as
+    soon as its closing tag arrives. Parsed entries are cleared so memory
+    stays flat on large feeds. Raises xml.etree.ElementTree.ParseError on
+    malformed XML."""
+    from xml.etree.ElementTree import XMLPullParser
+
+    parser = XMLPullParser(events=('end',))
+    def drain():
+        for _, elem in parser.read_events():
+            if _local_name(elem.tag) in ENTRY_TAGS:
+                yield _entry_from_element(elem)
+                elem.clear()
+    for chunk in chunks:
+        parser.feed(chunk)
+        yield from drain()
+    parser.close()
+    yield from drain()
+
+def parse_feed_date(value):
+    """RSS (RFC 822) or Atom (ISO 8601) date string -> epoch, or None"""
+    if not value:
+        return None
+    from email.utils import parsedate_to_datetime
+    try:
+        parsed = parsedate_to_datetime(value.strip())
+    except (TypeError, ValueError, IndexError):
+        return parse_iso_epoch(value.strip())
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+def entry_url(entry):
+    link = entry['link']
+    return link.split('?')[0] if '?' in link else link
+
+def is_new_entry(feed_url, entry, source=None):
+    """Not yet posted by some account that would queue it (any account
+    when the source isn't known)"""
+    stores = None if source is None else interested_stores(source, entry['title'])
+    return is_unposted(entry_url(entry), stores)
+
+def is_scholarship_title(title):
+    return any(w in title.lower() for w in ['scholarship', 'grant', 'funded'])
+
+def is_new_scholarship(feed_url, entry, source=None):
+    return is_scholarship_title(entry['title']) and is_new_entry(feed_url, entry, source)
+
 # ============================================================================
 # SMART DATA EXTRACTION (PRESERVED)
 # ============================================================================
 
+# Everything below is compiled once at import time; extract_smart_details()
+# then makes a single pass over the text for each kind of detail.
+
+SALARY_RE = re.compile(r'(\$|₦|N)\s?[\d,kK]+(\s*(-|—|to)\s*(\$|₦|N)\s?[\d,kK]+)?\s*(/yr|/mo|/year|/month|annually)?',
+                       re.IGNORECASE)
+EMAIL_RE = re.compile(r'[\w\.-]+@[\w\.-]+\.\w+')
+EMAIL_IGNORE = ('noreply', 'support', 'help', 'info', 'example', 'wixpress')
+
+BENEFIT_KEYWORDS = {
+    'Health': ['health insurance', 'medical', 'dental'],
+    'Remote': ['remote', 'work from home', 'wfh'],
+    'Visa': ['visa sponsorship', 'relocation'],
+    'Equity': ['stock options', 'equity', 'shares'],
+    'Flexible': ['flexible hours', 'async'],
+    'Vacation': ['unlimited pto', 'paid time off', 'vacation'],
+    'Crypto': ['crypto', 'bitcoin', 'web3']
+}
+MAX_BENEFITS = 3
+_BENEFIT_LABELS = {kw: label for label, kws in BENEFIT_KEYWORDS.items() for kw in kws}
+_BENEFIT_ORDER = list(BENEFIT_KEYWORDS)
+# Zero-width lookahead so overlapping keywords ("asyncrypto") are all seen,
+# exactly like the old per-keyword substring scans.
+BENEFIT_RE = re.compile('(?=(%s))' % '|'.join(
+    re.escape(kw) for kw in sorted(_BENEFIT_LABELS, key=len, reverse=True)))
+
+class _TextExtractor(HTMLParser):
+    """Streaming HTML -> text, equivalent to BeautifulSoup's
+    get_text(separator=' ', strip=True) with the html.parser builder.
+
+    Only a stack of open tag names is kept (no tree): strings under
+    script/style/template/rt/rp and comments are skipped, CDATA is kept,
+    adjacent text and entity references merge into one string until the
+    next tag, and an end tag closes everything opened after its match.
+    """
+
+    SKIP_TAGS = frozenset(('script', 'style', 'template', 'rt', 'rp'))
+    VOID_TAGS = frozenset(('area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'keygen',
+                           'link', 'menuitem', 'meta', 'param', 'source', 'track', 'wbr', 'basefont',
+                           'bgsound', 'command', 'frame', 'image', 'isindex', 'nextid', 'spacer'))
+
+    def __init__(self):
+        super().__init__(convert_charrefs=False)
+        self.parts = []
+        self._buffer = []
+        self._stack = []
+        self._skip_depth = 0
+        self._closed_void = []
+
+    def _flush(self):
+        if self._buffer:
+            text = ''.join(self._buffer).strip()
+            self._buffer = []
+            if text and not self._skip_depth:
+                self.parts.append(text)
+
+    def handle_starttag(self, tag, attrs):
+        self._flush()
+        if tag in self.VOID_TAGS:
+            self._closed_void.append(tag)
+            return
+        self._stack.append(tag)
+        if tag in self.SKIP_TAGS:
+            self._skip_depth += 1
+
+    def handle_startendtag(self, tag, attrs):
+        self._flush()
+
+    def handle_endtag(self, tag):
+        if tag in self._closed_void:
+            self._closed_void.remove(tag)  # redundant </br> after <br>
+            return
+        self._flush()
+        if tag not in self._stack:
+            return
+        while True:
+            closed = self._stack.pop()
+            if closed in self.SKIP_TAGS:
+                self._skip_depth -= 1
+            if closed == tag:
+                break
+
+    def handle_data(self, data):
+        self._buffer.append(data)
+
+    def handle_entityref(self, name):
+        char = html_entities.html5.get(name + ';')
+        self._buffer.append(char if char is not None else '&' + name)
+
+    def handle_charref(self, name):
+        self._buffer.append(html.unescape(f'&#{name};'))
+
+    def handle_comment(self, data):
+        self._flush()
+
+    def handle_decl(self, decl):
+        self._flush()
+
+    def handle_pi(self, data):
+        self._flush()
+
+    def unknown_decl(self, data):
+        self._flush()
+        if data.startswith('CDATA['):
+            text = data[6:].strip()
+            if text:  # CDATA is kept even inside skipped tags, like bs4
+                self.parts.append(text)
+
+    def close(self):
+        super().close()
+        self._flush()
+
+def html_to_text(html_text):
+    if '<' not in html_text and '&' not in html_text:
+        return html_text.strip()  # plain text: nothing to tokenize
+    parser = _TextExtractor()
+    parser.feed(html_text)
+    parser.close()
+    return ' '.join(parser.parts)
+
 def extract_smart_details(html_text):
-    soup = BeautifulSoup(html_text, 'html.parser')
-    text = soup.get_text(separator=' ', strip=True)
+    text = html_to_text(html_text)
     
     details = {'salary': None, 'email': None, 'benefits': []}
     
     # Salary
-    salary_patterns = [r'(\$|₦|N)\s?[\d,kK]+(\s*(-|—|to)\s*(\$|₦|N)\s?[\d,kK]+)?\s*(/yr|/mo|/year|/month|annually)?']
-    for pattern in salary_patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
-        if match:
-            s = match.group(0).strip().replace('—', '-')
-            if len(s) > 3: details['salary'] = s; break
+    match = SALARY_RE.search(text)
+    if match:
+        s = match.group(0).strip().replace('—', '-')
+        if len(s) > 3: details['salary'] = s
     
     # Email
-    emails = re.findall(r'[\w\.-]+@[\w\.-]+\.\w+', text)
-    ignore = ['noreply', 'support', 'help', 'info', 'example', 'wixpress']
-    for email in emails:
-        if not any(x in email.lower() for x in ignore):
+    for match in EMAIL_RE.finditer(text):
+        email = match.group(0)
+        if not any(x in email.lower() for x in EMAIL_IGNORE):
             details['email'] = email; break
     
-    # Benefits
-    benefit_keywords = {
-        'Health': ['health insurance', 'medical', 'dental'],
-        'Remote': ['remote', 'work from home', 'wfh'],
-        'Visa': ['visa sponsorship', 'relocation'],
-        'Equity': ['stock options', 'equity', 'shares'],
-        'Flexible': ['flexible hours', 'async'],
-        'Vacation': ['unlimited pto', 'paid time off', 'vacation'],
-        'Crypto': ['crypto', 'bitcoin', 'web3']
-    }
-    found_benefits = []
-    text_lower = text.lower()
-    for label, patterns in benefit_keywords.items():
-        if any(p in text_lower for p in patterns):
-            found_benefits.append(label)
-            if len(found_benefits) >= 3: break
+    # Benefits — one scan collects every label, then keep the first
+    # MAX_BENEFITS in BENEFIT_KEYWORDS order.
+    found = set()
+    for match in BENEFIT_RE.finditer(text.lower()):
+        found.add(_BENEFIT_LABELS[match.group(1)])
+        if len(found) == len(_BENEFIT_ORDER): break
     
-    details['benefits'] = found_benefits
+    details['benefits'] = [label for label in _BENEFIT_ORDER if label in found][:MAX_BENEFITS]
     return details
 
 # ============================================================================
-# RSS FEED SCRAPERS
+# SOURCE PIPELINE
 # ============================================================================
 
-def fetch_rss_jobs(feed_url, source_name, is_remote=False, country="Nigeria"):
-    jobs = []
-    print(f"📡 Fetching: {source_name}...")
-    try:
-        headers = {'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36'}
-        response = requests.get(feed_url, headers=headers, timeout=15)
-        feed = feedparser.parse(response.content)
-        
-        if not feed.entries: return jobs
-        
-        posted_urls = load_json(POSTED_URLS_FILE)
-        if not isinstance(posted_urls, list): posted_urls = []
-        
-        for entry in feed.entries[:5]: # Top 5 per feed
-            try:
-                raw_html = ""
-                if hasattr(entry, 'content'): raw_html = entry.content[0].value
-                elif hasattr(entry, 'summary'): raw_html = entry.summary
-                elif hasattr(entry, 'description'): raw_html = entry.description
-                
-                job_url = entry.link.split('?')[0] if '?' in entry.link else entry.link
-                if job_url in posted_urls: continue
-                
-                details = extract_smart_details(raw_html)
-                
-                title_lower = entry.title.lower()
-                if 'lagos' in title_lower: location = 'Lagos 🇳🇬'
-                elif 'abuja' in title_lower: location = 'Abuja 🇳🇬'
-                elif is_remote: location = 'Remote 🌍'
-                else: location = f'{country} 🇳🇬'
-                
-                jobs.append({
-                    'title': entry.title.strip(),
-                    'url': job_url,
-                    'location': location,
-                    'salary': details['salary'],
-                    'email': details['email'],
-                    'benefits': details['benefits'],
-                    'type': 'job'
-                })
-            except: continue
-    except Exception as e:
-        print(f"  ✗ Error: {e}")
-    return jobs
-
-def scrape_scholarships():
-    scholarships = []
-    print("🎓 Fetching Scholarships...")
-    rss_feeds = ["https://www.opportunitiesforafricans.com/feed/", "https://www.scholars4dev.com/feed/"]
-    posted_urls = load_json(POSTED_URLS_FILE)
-    if not isinstance(posted_urls, list): posted_urls = []
+def iter_sources(sources=None):
+    """Registry entries with SOURCE_DEFAULTS filled in"""
+    return [{**SOURCE_DEFAULTS, **source} for source in (SOURCES if sources is None else sources)]
+
+def classify_location(source, title):
+    title_lower = title.lower()
+    for keyword, label in source['locations']:
+        if keyword in title_lower:
+            return label
+    return source['default_location']
+
+def build_job(source, entry):
+    details = extract_smart_details(entry['html'])
+    return {
+        'title': entry['title'].strip(),
+        'url': entry_url(entry),
+        'location': classify_location(source, entry['title']),
+        'salary': details['salary'],
+        'email': details['email'],
+        'benefits': details['benefits'],
+        'type': 'job'
+    }
+
+def build_scholarship(source, entry):
+    title = entry['title'].strip()
+    if not is_scholarship_title(title): return None
     
-    for feed_url in rss_feeds:
-        try:
-            feed = feedparser.parse(feed_url)
-            for entry in feed.entries[:3]:
+    year = datetime.now().year
+    if str(year) not in title and str(year + 1) not in title: title = f"{title} {year + 1}"
+    is_funded = 'fully funded' in title.lower()
+    
+    return {
+        'title': title,
+        'url': entry_url(entry),
+        'location': classify_location(source, title),
+        'salary': 'Fully Funded' if is_funded else 'Scholarship',
+        'email': None,
+        'benefits': ['Tuition', 'Stipend'] if is_funded else ['Education'],
+        'type': 'scholarship'
+    }
+
+# type -> (entry filter used while streaming, entry -> opportunity builder)
+SOURCE_TYPES = {
+    'job': (is_new_entry, build_job),
+    'scholarship': (is_new_scholarship, build_scholarship),
+}
+
+def build_opportunity(source, entry):
+    """Entry -> opportunity dict (or None) using the builder for the source's type"""
+    _, build = SOURCE_TYPES[source['type']]
+    try:
+        opp = build(source, entry)
+    except Exception:
+        return None
+    if opp is None: return None
+    opp['source'] = source['name']
+    opp['quality'] = source['quality']
+    opp['published'] = parse_feed_date(entry.get('published'))
+    if source['tags']: opp['tags'] = list(source['tags'])
+    return opp
+
+def _build_chunk(pairs):
+    return [build_opportunity(source, entry) for source, entry in pairs]
+
+def extract_batch(pairs, processes=None):
+    """Build opportunities for [(source, entry), ...], results in input order.
+
+    Large batches are split into EXTRACT_CHUNK_SIZE chunks and spread over a
+    process pool (HTML parsing and regex work are CPU-bound, so threads
+    wouldn't help); small ones, or processes=1, run serially.
+    """
+    processes = processes or EXTRACT_PROCESSES or os.cpu_count() or 1
+    if processes <= 1 or len(pairs) < EXTRACT_PARALLEL_MIN_ENTRIES:
+        return _build_chunk(pairs)
+
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+    chunks = [pairs[i:i + EXTRACT_CHUNK_SIZE] for i in range(0, len(pairs), EXTRACT_CHUNK_SIZE)]
+    # Never fork: fetch threads that outlived FETCH_DEADLINE_SECONDS may hold
+    # locks (logging, SSL, DNS) a forked child would inherit and deadlock on
+    method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+    try:
+        with ProcessPoolExecutor(max_workers=min(processes, len(chunks)),
+                                 mp_context=multiprocessing.get_context(method)) as pool:
+            return [opp for chunk in pool.map(_build_chunk, chunks) for opp in chunk]
+    except (OSError, RuntimeError) as e:
+        # e.g. no /dev/shm or process limits in a sandboxed runner
+        print(f"  ⚠️  Process pool unavailable ({e}); extracting serially")
+        return _build_chunk(pairs)
+
+def select_entries(source, entries):
+    """The entries from one source that still need extracting"""
+    return [e for e in entries[:source['limit']]
+            if is_unposted(entry_url(e), interested_stores(source, e['title']))]
+
+class SourceHealth:
+    """Per-source fetch stats and circuit breaker, persisted in SOURCE_STATS_FILE.
+
+    Every failure doubles the source's cool-down (BREAKER_BASE_MINUTES up to
+    BREAKER_MAX_MINUTES); while it's open the source isn't requested at all.
+    The first success closes it again.
+    """
+
+    def __init__(self, path=SOURCE_STATS_FILE):
+        self.path = path
+        self.stats = load_json(path) if path else {}
+        if not isinstance(self.stats, dict): self.stats = {}
+
+    def _get(self, name):
+        return self.stats.setdefault(name, {'fetches': 0, 'failures': 0, 'consecutive_failures': 0,
+                                            'open_until': 0, 'avg_latency_ms': None, 'last_yield': 0,
+                                            'total_yield': 0, 'bytes': 0, 'last_error': None})
+
+    def is_open(self, name, now=None):
+        return (now or time.time()) < self.stats.get(name, {}).get('open_until', 0)
+
+    def record(self, name, result, yielded=0, now=None):
+        """Update a source from its fetch_feeds() report entry"""
+        now = now or time.time()
+        stats = self._get(name)
+        if result['status'] == 'fresh':
+            return
+        stats['fetches'] += 1
+        latency_ms = round(result['seconds'] * 1000)
+        previous = stats['avg_latency_ms']
+        stats['avg_latency_ms'] = latency_ms if previous is None else round(0.8 * previous + 0.2 * latency_ms)
+        stats['bytes'] += result['bytes']
+        stats['last_fetch'] = now
+        if result['status'] == 'failed':
+            stats['failures'] += 1
+            stats['consecutive_failures'] += 1
+            cooldown = min(BREAKER_BASE_MINUTES * 2 ** (stats['consecutive_failures'] - 1), BREAKER_MAX_MINUTES)
+            stats['open_until'] = now + cooldown * 60
+            stats['last_error'] = result['error']
+            print(f"  🔌 {name} failed {stats['consecutive_failures']}x in a row — skipping it for {cooldown}m")
+        else:
+            stats['consecutive_failures'] = 0
+            stats['open_until'] = 0
+            stats['last_yield'] = yielded
+            stats['total_yield'] += yielded
+
+    def save(self):
+        if self.path:
+            save_json(self.path, self.stats)
+
+def collect_opportunities(sources=None, health=None):
+    """Fetch every registered source through the shared streaming pipeline
+    and return their opportunities. Sources with an open circuit breaker
+    are skipped without a request."""
+    sources = iter_sources(sources)
+    health = health or SourceHealth()
+    now = time.time()
+
+    active = []
+    for source in sources:
+        if health.is_open(source['name'], now):
+            print(f"  🔌 Skipping {source['name']} (circuit open after repeated failures)")
+        else:
+            active.append(source)
+
+    limits = {s['url']: s['limit'] for s in active}
+    filters = {s['url']: _counting_filter(SOURCE_TYPES[s['type']][0], s) for s in active}
+    report = {}
+    with metrics.span('fetch'):
+        feed_entries = fetch_feeds([s['url'] for s in active], limits=limits, filters=filters, report=report)
+
+    # Fetch stage done; batch every new entry through one extraction stage
+    pairs = []
+    for source in active:
+        pairs.extend((source, entry) for entry in select_entries(source, feed_entries.get(source['url']) or []))
+    with metrics.span('extract'):
+        built = extract_batch(pairs)
+
+    opportunities = [opp for opp in built if opp is not None]
+    yields = {}
+    for opp in opportunities:
+        yields[opp['source']] = yields.get(opp['source'], 0) + 1
+    for source in active:
+        result = report.get(source['url'])
+        if result is None:
+            continue
+        metrics.record(f"fetch:{source['name']}", result['seconds'])
+        metrics.count('bytes_fetched', result['bytes'])
+        if result['status'] == 'changed':
+            print(f"📡 {source['name']}: {yields.get(source['name'], 0)} new")
+        elif result['status'] != 'failed':
+            print(f"📡 {source['name']}: nothing new")
+        health.record(source['name'], result, yielded=yields.get(source['name'], 0), now=now)
+    health.save()
+    metrics.count('opportunities', len(opportunities))
+    return opportunities
+
+def _counting_filter(accept, source):
+    """Bind a SOURCE_TYPES entry filter to its source and count entries
+    seen / filtered out"""
+    def counted(url, entry):
+        metrics.count('entries_seen')
+        if accept(url, entry, source):
+            return True
+        metrics.count('entries_filtered')  # already posted, or wrong kind of entry
+        return False
+    return counted
+
+# ============================================================================
+# NEAR-DUPLICATE DETECTION
+# ============================================================================
+
+TITLE_STOPWORDS = frozenset((
+    'a', 'an', 'and', 'the', 'of', 'for', 'in', 'at', 'to', 'job', 'jobs', 'vacancy', 'vacancies',
+    'recruitment', 'latest', 'apply', 'now', 'hiring', 'ltd', 'limited', 'plc', 'nigeria', 'remote',
+))
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+_SIGNATURE_MASK = (1 << 64) - 1
+
+def opportunity_features(opp):
+    """Weighted features for an opportunity: title words and word pairs,
+    the company (text after the last ' at '), salary digits and email."""
+    title = opp.get('title', '').lower()
+    words = [w for w in _TOKEN_RE.findall(title) if w not in TITLE_STOPWORDS]
+    features = {}
+    for w in words:
+        features[w] = features.get(w, 0) + 1
+    for a, b in zip(words, words[1:]):
+        features[a + ' ' + b] = features.get(a + ' ' + b, 0) + 1
+    if ' at ' in title:
+        company = ' '.join(w for w in _TOKEN_RE.findall(title.rsplit(' at ', 1)[1]) if w not in TITLE_STOPWORDS)
+        if company:
+            features['company:' + company] = 3
+    if opp.get('salary'):
+        digits = ''.join(ch for ch in opp['salary'] if ch.isdigit())
+        if digits:
+            features['salary:' + digits] = 2
+    if opp.get('email'):
+        features['email:' + opp['email'].lower()] = 3
+    return features
+
+def simhash(features):
+    """64-bit SimHash of a {feature: weight} dict"""
+    import hashlib
+    totals = [0] * 64
+    for feature, weight in features.items():
+        h = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), 'big')
+        for bit in range(64):
+            totals[bit] += weight if (h >> bit) & 1 else -weight
+    signature = 0
+    for bit, total in enumerate(totals):
+        if total > 0:
+            signature |= 1 << bit
+    return signature
+
+def opportunity_signature(opp):
+    """SimHash of an opportunity, or None when it has nothing to compare on"""
+    features = opportunity_features(opp)
+    return simhash(features) if features else None
+
+class NearDupIndex:
+    """SimHash signatures of recently queued/posted items with an LSH index.
+
+    The 64 bits are split into NEAR_DUP_BANDS bands; two signatures within
+    NEAR_DUP_MAX_DISTANCE bits must agree on at least one whole band, so a
+    lookup only compares against items sharing a band instead of scanning
+    the whole history. Persisted like PostedStore: NEAR_DUP_FILE gets one
+    {"sig", "at"} line per new signature, and is only rewritten once
+    expired lines outnumber live ones. (With the sqlite backend it is a
+    {hex signature: added epoch} blob in StateDB.)
+    """
+
+    def __init__(self, path=NEAR_DUP_FILE, bands=NEAR_DUP_BANDS, max_distance=NEAR_DUP_MAX_DISTANCE,
+                 legacy_path=None):
+        if bands <= max_distance:
+            raise ValueError("NEAR_DUP_BANDS must exceed NEAR_DUP_MAX_DISTANCE")
+        self.path = path
+        self.legacy_path = legacy_path
+        self.max_distance = max_distance
+        self.band_bits = 64 // bands
+        self.bands = bands
+        self.signatures = {}  # signature -> added epoch
+        self._buckets = [{} for _ in range(bands)]
+        self._appended = []   # signatures added since the last save
+        if path and _uses_db(path):
+            stored = load_json(path)
+            stored, self._lines = (stored if isinstance(stored, dict) else {}), 0
+        else:
+            stored, self._lines = self.read_log(path, legacy_path) if path else ({}, 0)
+        cutoff = time.time() - NEAR_DUP_RETENTION_DAYS * 86400
+        for hex_sig, added in stored.items():
+            if added >= cutoff:
+                self._insert(int(hex_sig, 16), added)
+        # Expired lines or a legacy map to migrate: rewrite on the next save
+        self.dirty = bool(self._lines or self.signatures) and self._needs_rewrite()
+
+    @staticmethod
+    def read_log(path, legacy_path=None):
+        """({hex signature: added epoch}, lines read) from the log at `path`,
+        or from the legacy JSON map at `legacy_path` if there is no log yet"""
+        if not os.path.exists(path):
+            legacy = _load_json_file(legacy_path, None) if legacy_path else None
+            return (legacy if isinstance(legacy, dict) else {}), 0
+        stored, lines = {}, 0
+        with open(path, 'r') as f:
+            for line in f:
+                lines += 1
                 try:
-                    job_url = entry.link.split('?')[0] if '?' in entry.link else entry.link
-                    if job_url in posted_urls: continue
-                    
-                    title = entry.title.strip()
-                    if not any(w in title.lower() for w in ['scholarship', 'grant', 'funded']): continue
-                    
-                    year = datetime.now().year
-                    if str(year) not in title and str(year + 1) not in title: title = f"{title} {year + 1}"
-                    is_funded = 'fully funded' in title.lower()
-                    
-                    scholarships.append({
-                        'title': title,
-                        'url': job_url,
-                        'location': 'International 🌍',
-                        'salary': 'Fully Funded' if is_funded else 'Scholarship',
-                        'email': None,
-                        'benefits': ['Tuition', 'Stipend'] if is_funded else ['Education'],
-                        'type': 'scholarship'
-                    })
-                except: continue
-        except: continue
-    return scholarships
+                    record = json.loads(line)
+                    stored[record['sig']] = record['at']
+                except (ValueError, KeyError, TypeError):
+                    continue  # skip a torn last line
+        return stored, lines
+
+    def _needs_rewrite(self):
+        return not self._lines or self._lines + len(self._appended) > 2 * len(self.signatures)
+
+    def _band_keys(self, signature):
+        mask = (1 << self.band_bits) - 1
+        return [(signature >> (i * self.band_bits)) & mask for i in range(self.bands)]
+
+    def _insert(self, signature, added):
+        if signature not in self.signatures:
+            for bucket, key in zip(self._buckets, self._band_keys(signature)):
+                bucket.setdefault(key, []).append(signature)
+        self.signatures[signature] = added
+
+    def __len__(self):
+        return len(self.signatures)
+
+    def find(self, signature):
+        """A stored signature within max_distance bits of `signature`, or None"""
+        for bucket, key in zip(self._buckets, self._band_keys(signature)):
+            for candidate in bucket.get(key, ()):
+                if bin(candidate ^ signature).count('1') <= self.max_distance:
+                    return candidate
+        return None
+
+    def add(self, signature, when=None):
+        signature &= _SIGNATURE_MASK
+        self._insert(signature, when or time.time())
+        self._appended.append(signature)
+        self.dirty = True
+
+    def save(self):
+        if not (self.dirty and self.path):
+            return
+        if _uses_db(self.path):
+            save_json(self.path, {format(sig, '016x'): int(added) for sig, added in self.signatures.items()},
+                      compact=True)
+        elif self._needs_rewrite():
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                for sig, added in self.signatures.items():
+                    f.write(json.dumps({'sig': format(sig, '016x'), 'at': int(added)}) + '\n')
+            os.replace(tmp_path, self.path)
+            self._lines = len(self.signatures)
+            if self.legacy_path and os.path.exists(self.legacy_path):
+                os.remove(self.legacy_path)
+        else:
+            with open(self.path, 'a') as f:
+                for sig in self._appended:
+                    f.write(json.dumps({'sig': format(sig, '016x'), 'at': int(self.signatures[sig])}) + '\n')
+            self._lines += len(self._appended)
+        self._appended = []
+        self.dirty = False
+
+# ============================================================================
+# SLOT ALLOCATION
+# ============================================================================
+
+def parse_iso_epoch(value, default=None):
+    try:
+        return datetime.fromisoformat(value.replace('Z', '+00:00')).timestamp()
+    except (AttributeError, TypeError, ValueError):
+        return default
+
+class SlotAllocator:
+    """Free posting slots kept in a min-heap, so each assignment is O(log n).
+
+    Slots are the ALLOWED_HOURS_UTC hours after `now`, across `horizon_days`
+    days, minus the slots unposted items already occupy. When the horizon is
+    used up the next window of days is generated on demand.
+    """
+
+    def __init__(self, schedule=(), now=None, hours=None, horizon_days=SLOT_HORIZON_DAYS):
+        now = now or datetime.now(timezone.utc)
+        self.hours = sorted(set(ALLOWED_HOURS_UTC if hours is None else hours))
+        self.horizon_days = horizon_days
+        self.used = set()
+        for p in schedule:
+            if not p.get('posted', False):
+                when = parse_iso_epoch(p.get('scheduled_time'))
+                if when is not None:
+                    self.used.add(when)
+        self._floor = now.timestamp()
+        self._day0 = now.replace(hour=0, minute=0, second=0, microsecond=0)
+        self._days_generated = 0
+        self._heap = []
+        self._extend()
+
+    def _extend(self):
+        for offset in range(self._days_generated, self._days_generated + self.horizon_days):
+            day = self._day0 + timedelta(days=offset)
+            for hour in self.hours:
+                when = (day + timedelta(hours=hour)).timestamp()
+                if when > self._floor and when not in self.used:
+                    heapq.heappush(self._heap, when)
+        self._days_generated += self.horizon_days
+
+    def __len__(self):
+        return len(self._heap)
+
+    def assign(self, now=None):
+        """Claim the earliest free slot after `now` and return it as a UTC datetime"""
+        if not self.hours:
+            raise ValueError("no posting hours configured")
+        if now is not None:
+            self._floor = max(self._floor, now.timestamp())
+        while True:
+            while self._heap and self._heap[0] <= self._floor:
+                heapq.heappop(self._heap)  # slot passed while we were running
+            if self._heap:
+                break
+            self._extend()
+        when = heapq.heappop(self._heap)
+        self.used.add(when)
+        return datetime.fromtimestamp(when, timezone.utc)
+
+# ============================================================================
+# RANKING
+# ============================================================================
+
+def score_opportunity(opp, now=None):
+    """0..100 from the opportunity alone (see SCORE_WEIGHTS). Computed once
+    at refill and stored on the queued item as 'score'."""
+    now = now or time.time()
+    if opp.get('published') is None:
+        freshness = 0.5  # undated: neither fresh nor stale
+    else:
+        age_hours = max(0.0, now - opp['published']) / 3600
+        freshness = 0.5 ** (age_hours / FRESHNESS_HALF_LIFE_HOURS)
+    parts = {
+        'freshness': freshness,
+        # the bare 'Scholarship' label isn't funding information
+        'salary': 1.0 if opp.get('salary') not in (None, 'Scholarship') else 0.0,
+        'email': 1.0 if opp.get('email') else 0.0,
+        'benefits': min(len(opp.get('benefits') or ()), MAX_BENEFITS) / MAX_BENEFITS,
+        'source': opp.get('quality', 1.0),
+    }
+    return round(sum(SCORE_WEIGHTS[name] * value for name, value in parts.items()), 2)
+
+def rank_opportunities(opportunities, queued_types=(), pool_size=RANK_POOL_SIZE):
+    """Yield scored opportunities best first, keeping the type mix balanced.
+
+    Only the `pool_size` best candidates of each type are kept (heapq's
+    bounded nlargest). Each pick then goes to the type whose best remaining
+    candidate scores highest after a TYPE_BALANCE_WEIGHT bonus/penalty for
+    how far that type is below/above its TYPE_TARGET_SHARE of the queue
+    (`queued_types` plus everything yielded so far).
+    """
+    by_type = {}
+    for opp in opportunities:
+        by_type.setdefault(opp['type'], []).append(opp)
+    heaps = {}
+    for kind, opps in by_type.items():
+        best = heapq.nlargest(pool_size, opps, key=lambda opp: opp['score'])
+        heaps[kind] = [(-opp['score'], i, opp) for i, opp in enumerate(best)]  # sorted, so already a heap
+
+    counts = {}
+    for kind in queued_types:
+        counts[kind] = counts.get(kind, 0) + 1
+    total = sum(counts.values())
+
+    def adjusted(kind):
+        share = counts.get(kind, 0) / total if total else 0.0
+        return -heaps[kind][0][0] + TYPE_BALANCE_WEIGHT * (TYPE_TARGET_SHARE.get(kind, 0.0) - share)
+
+    while heaps:
+        kind = max(heaps, key=adjusted)
+        opp = heapq.heappop(heaps[kind])[2]
+        if not heaps[kind]:
+            del heaps[kind]
+        counts[kind] = counts.get(kind, 0) + 1
+        total += 1
+        yield opp
 
 # ============================================================================
 # QUEUE MANAGEMENT
 # ============================================================================
 
+# Hashtags for items whose source doesn't define its own, by audience
+HASHTAGS = {
+    'scholarship': ('#Scholarships', '#StudyAbroad', '#FullyFunded'),
+    'remote': ('#RemoteJobs', '#TechJobs', '#Wfh'),
+    'nigeria': ('#NigeriaJobs', '#Lagos', '#JobSearch'),
+}
+
+_EMOJI = '[\u00a9\u00ae\u203c\u2049\u2122\u2139\u2194-\u21aa\u2300-\u23ff\u2600-\u27bf\u2b00-\u2bff\U0001f000-\U0001faff]'
+_EMOJI_MODIFIERS = '[\ufe0f\u20e3\U0001f3fb-\U0001f3ff]*'
+TWEET_TOKEN_RE = re.compile(
+    r'(?P<url>https?://\S+)'
+    # Bare domains may be linkified by X; count them at least as a link
+    r'|(?P<domain>(?<![@\w.-])(?:[a-z0-9-]+\.)+[a-z]{2,}(?![\w@-])(?:/\S*)?)'
+    r'|(?P<emoji>[\U0001f1e6-\U0001f1ff]{2}|[0-9#*]\ufe0f?\u20e3'
+    r'|' + _EMOJI + _EMOJI_MODIFIERS + r'(?:\u200d' + _EMOJI + _EMOJI_MODIFIERS + r')*)',
+    re.IGNORECASE)
+
+def _char_weight(ch):
+    cp = ord(ch)
+    if cp <= 0x10FF or 0x2000 <= cp <= 0x200D or 0x2010 <= cp <= 0x201F or 0x2032 <= cp <= 0x2037:
+        return 1
+    return 2
+
+def _plain_weight(text):
+    return len(text) if text.isascii() else sum(map(_char_weight, text))
+
+def tweet_weight(text):
+    """Length of `text` as X counts it against TWEET_MAX_WEIGHT"""
+    text = unicodedata.normalize('NFC', text)
+    weight = pos = 0
+    for match in TWEET_TOKEN_RE.finditer(text):
+        weight += _plain_weight(text[pos:match.start()])
+        kind = match.lastgroup
+        if kind == 'url':
+            weight += TWEET_URL_WEIGHT
+        elif kind == 'domain':
+            weight += max(TWEET_URL_WEIGHT, _plain_weight(match.group()))
+        else:
+            weight += 2
+        pos = match.end()
+    return weight + _plain_weight(text[pos:])
+
+def _shorten(text, max_weight):
+    """Longest prefix of `text` that, with '...' appended, weighs <= max_weight"""
+    if tweet_weight(text) <= max_weight:
+        return text
+    lo, hi = 0, len(text)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if tweet_weight(text[:mid].rstrip() + '...') <= max_weight:
+            lo = mid
+        else:
+            hi = mid - 1
+    return text[:lo].rstrip() + '...'
+
+def default_hashtags(item):
+    if item['type'] == 'scholarship':
+        return HASHTAGS['scholarship']
+    return HASHTAGS['remote'] if 'Remote' in item['location'] else HASHTAGS['nigeria']
+
+def _compose_tweet(icon, title, location, salary, benefits, email, url, tags):
+    lines = [f"{icon} {title}", "", f"📍 {location} | 💰 {salary}" if salary else f"📍 {location}"]
+    if benefits: lines.append(" | ".join(benefits))
+    lines += ["", "👉 APPLY:"]
+    if email: lines.append(f"📧 {email}")
+    lines.append(f"🔗 {url}")
+    if tags: lines += ["", ' '.join(tags)]
+    return "\n".join(lines)
+
 def format_rich_tweet(item):
+    """Tweet text for one opportunity, trimmed to fit TWEET_MAX_WEIGHT.
+
+    Drops tags and benefits beyond the first, then shortens the title (not
+    below TWEET_TITLE_MIN_CHARS), then drops the remaining benefit and tag,
+    the title floor, and finally the email and salary.
+    """
     icon = '🎓' if item['type'] == 'scholarship' else '🔥'
-    title = item['title'][:70] + "..." if len(item['title']) > 70 else item['title']
-    tweet = f"{icon} {title}\n\n📍 {item['location']}"
-    if item['salary']: tweet += f" | 💰 {item['salary']}"
-    if item['benefits']: tweet += "\n" + " | ".join([f"✅ {b}" for b in item['benefits'][:3]])
-    tweet += "\n\n👉 APPLY:"
-    if item['email']: tweet += f"\n📧 {item['email']}"
-    tweet += f"\n🔗 {item['url']}"
-    
-    tags = []
-    if item['type'] == 'scholarship': tags = ['#Scholarships', '#StudyAbroad', '#FullyFunded']
-    elif 'Remote' in item['location']: tags = ['#RemoteJobs', '#TechJobs', '#Wfh']
-    else: tags = ['#NigeriaJobs', '#Lagos', '#JobSearch']
-    
-    tweet += f"\n\n{' '.join(tags)}"
+    full_title = item['title']
+    title = full_title[:TWEET_TITLE_MAX_CHARS] + "..." if len(full_title) > TWEET_TITLE_MAX_CHARS else full_title
+    benefits = [f"✅ {b}" for b in (item['benefits'] or [])[:TWEET_MAX_BENEFITS]]
+    tags = list(item.get('tags') or default_hashtags(item))  # sources may define their own
+    extras = {'salary': item['salary'], 'email': item['email']}
+
+    def render():
+        return _compose_tweet(icon, title, item['location'], extras['salary'], benefits,
+                              extras['email'], item['url'], tags)
+
+    tweet = render()
+    over = tweet_weight(tweet) - TWEET_MAX_WEIGHT
+    if over <= 0:
+        return tweet
+
+    def shorten_title(min_chars):
+        nonlocal title
+        target = tweet_weight(title) - over
+        title = _shorten(full_title, max(target, tweet_weight(full_title[:min_chars]) + 3))
+
+    steps = [lambda: len(tags) > 1 and tags.pop(),
+             lambda: len(benefits) > 1 and benefits.pop(),
+             lambda: shorten_title(TWEET_TITLE_MIN_CHARS),
+             lambda: benefits and benefits.pop(),
+             lambda: tags and tags.pop(),
+             lambda: shorten_title(1),
+             lambda: extras.update(email=None),
+             lambda: extras.update(salary=None)]
+    for step in steps:
+        while over > 0:
+            before = tweet
+            step()
+            tweet = render()
+            over = tweet_weight(tweet) - TWEET_MAX_WEIGHT
+            if tweet == before:
+                break
+        if over <= 0:
+            break
     return tweet
 
-def refill_queue(schedule):
+def refill_queue(schedule, slots=None, near_dups=None, opportunities=None, posted=None, now=None):
     """Scrape new opportunities and add them to queue.
 
     Posts are spread across the REMAINING allowed hours today (and overflow
     to tomorrow's hours if there are more posts than remaining slots), so a
-    refill doesn't bunch everything into a single timestamp.
+    refill doesn't bunch everything into a single timestamp. `slots` is the
+    run's SlotAllocator; one is built from `schedule` when omitted.
+    Opportunities that are near-duplicates of anything in `near_dups`
+    (recently queued or posted, possibly from another site) are skipped.
+    The REFILL_BATCH_SIZE best by rank_opportunities() are queued, best
+    first, so they also get the earliest slots.
+
+    `opportunities` (already scraped, e.g. routed to one account) skips
+    the scrape; `posted` is that account's PostedStore. `now` (a UTC
+    datetime) defaults to the current time.
     """
-    print("\n🔍 Refilling Queue...")
-    all_opportunities = []
-    all_opportunities.extend(fetch_rss_jobs("https://remoteok.com/remote-jobs.rss", "RemoteOK", is_remote=True))
-    all_opportunities.extend(fetch_rss_jobs("https://hotnigerianjobs.com/feed/", "HotNigerianJobs", is_remote=False))
-    all_opportunities.extend(fetch_rss_jobs("https://www.myjobmag.com/feed", "MyJobMag", is_remote=False))
-    all_opportunities.extend(scrape_scholarships())
-    
-    random.shuffle(all_opportunities)
+    if opportunities is None:
+        print("\n🔍 Refilling Queue...")
+        # Stream every registered source in parallel; each stops downloading
+        # once it has yielded enough new entries.
+        opportunities = collect_opportunities()
 
-    current_utc = datetime.now(timezone.utc)
-    current_hour = current_utc.hour
+    current_utc = now or datetime.now(timezone.utc)
+    candidates = []
+    for opp in opportunities:
+        if posted is not None and opp['url'] in posted:
+            continue  # another account wanted it; this one already posted it
+        if 'score' not in opp:
+            opp['score'] = score_opportunity(opp, current_utc.timestamp())
+        candidates.append(opp)
+    queued_types = [p['type'] for p in schedule if 'type' in p and not p.get('posted', False)]
+    if slots is None:
+        slots = SlotAllocator(schedule, now=current_utc)
 
-    # Hours still ahead of us today
-    remaining_today = [h for h in ALLOWED_HOURS_UTC if h > current_hour]
+    if near_dups is None:
+        near_dups = NearDupIndex(path=None)
 
-    # Already-used slots (today or future) so we don't double-book a slot
-    # that an earlier, still-unposted item already occupies.
-    used_slots = set()
-    for p in schedule:
-        if not p.get('posted', False) and p.get('scheduled_time'):
-            try:
-                used_slots.add(p['scheduled_time'])
-            except Exception:
-                pass
+    chosen = []
+    skipped_dups = 0
+    for opp in rank_opportunities(candidates, queued_types):
+        if len(chosen) >= REFILL_BATCH_SIZE:
+            break
+        signature = opportunity_signature(opp)
+        if signature is not None:
+            if near_dups.find(signature) is not None:
+                skipped_dups += 1
+                continue
+            near_dups.add(signature)
 
-    formatted_posts = []
-    day_offset = 0
-    hour_pool = list(remaining_today) if remaining_today else []
+        chosen.append(opp)
 
-    for opp in all_opportunities[:10]:  # Limit to 10 new posts per refill
-        scheduled_time = None
-        # Walk forward through hour_pool / next days until we find a free slot
-        while True:
-            if not hour_pool:
-                day_offset += 1
-                hour_pool = list(ALLOWED_HOURS_UTC)
-
-            hour = hour_pool.pop(0)
-            candidate_date = current_utc + timedelta(days=day_offset)
-            candidate = candidate_date.replace(hour=hour, minute=0, second=0, microsecond=0)
-            candidate_iso = candidate.isoformat()
-
-            if candidate_iso not in used_slots:
-                scheduled_time = candidate
-                used_slots.add(candidate_iso)
-                break
-            # else: slot taken, loop again and pull the next hour
+    with metrics.span('render'):
+        tweets = [format_rich_tweet(opp) for opp in chosen]
+
+    formatted_posts = []
+    for opp, tweet_text in zip(chosen, tweets):
+        # Earliest free slot (remaining hours today, then following days)
+        with metrics.span('slots'):
+            scheduled_time = slots.assign(now=current_utc)
 
         formatted_posts.append({
-            'tweet_text': format_rich_tweet(opp),
+            'tweet_text': tweet_text,
             'url': opp['url'],
+            'type': opp['type'],
+            'score': opp['score'],
             'posted': False,
             'scheduled_time': scheduled_time.isoformat(),
-            'added_at': current_utc.isoformat()
+            'added_at': current_utc.isoformat(),
+            'added_epoch': current_utc.timestamp()
         })
     
+    if skipped_dups:
+        print(f"  👯 Skipped {skipped_dups} near-duplicate(s) of queued/posted items")
+    metrics.count('near_duplicates', skipped_dups)
     return formatted_posts
 
 # ============================================================================
 # MAIN LOGIC
 # ============================================================================
 
-def main():
+def fast_path_check(now=None, account=None):
+    """Decide from an account's STATE_HEADER_FILE alone whether this run can
+    exit early (for that account).
+
+    Returns a reason string when there is provably nothing to do: no
+    cleanup due, the queue doesn't need a refill, and nothing can be
+    posted right now. Returns None when a full run is needed (including
+    when the header is missing or unreadable).
+    """
+    account = account or iter_accounts()[0]
+    try:
+        with open(os.path.join(account['state_dir'], STATE_HEADER_FILE), 'r') as f:
+            header = json.load(f)
+    except (OSError, ValueError):
+        return None
+    now = now or datetime.now(timezone.utc)
+    epoch = now.timestamp()
+
+    if header.get('date') != nigeria_today_str(now):
+        return None  # new day: tracker reset + cleanup
+    if header.get('queue', 0) < MIN_QUEUE_SIZE:
+        return None  # refill needed
+    if header.get('next_expiry') is not None and epoch >= header['next_expiry']:
+        return None  # something went stale and must be dropped
+
+    if now.hour not in account['allowed_hours_utc']:
+        return f"UTC hour {now.hour} is not a posting hour"
+    if header.get('count', 0) >= account['daily_limit']:
+        return f"daily limit reached ({header['count']}/{account['daily_limit']})"
+    if header.get('rate_limited_until') and epoch < header['rate_limited_until']:
+        return "X API rate limit window still active"
+    if header.get('next_due') is None or epoch < header['next_due']:
+        return "no queued post is due yet"
+    return None
+
+def main(full=False):
+    accounts = iter_accounts()
+    if not full:
+        with metrics.span('fast_path'):
+            reasons = [fast_path_check(account=a) for a in accounts]
+        if all(reasons):
+            reason = reasons[0] if len(accounts) == 1 else \
+                '; '.join(f"{a['name']}: {r}" for a, r in zip(accounts, reasons))
+            print(f"💤 Nothing to do: {reason}. (Use --full to force a full run.)")
+            metrics.emit('idle')
+            return
+
     print(f"\n{'='*60}")
     print(f"🤖 Smart Scheduler Bot")
     print(f"⏰ UTC: {datetime.now(timezone.utc).strftime('%H:%M:%S')}")
@@ -456,80 +2434,411 @@ def main():
     print(f"🇳🇬 Nigeria: {nigeria_time}")
     print(f"{'='*60}\n")
     
+    # Every state file is read exactly once here. Writes are atomic: the
+    # PostingEngine flushes the in-flight post marker before each
+    # create_tweet, and everything still dirty is flushed when the run ends
+    # (even if it ends early or with an error).
+    with metrics.span('load_state'):
+        states = [BotState(account) for account in accounts]
+    try:
+        run(states)
+    finally:
+        with metrics.span('flush'):
+            flushed = sum(state.flush() for state in states)
+        if flushed:
+            print(f"💾 Saved {flushed} state file(s).")
+        metrics.emit('full')
+
+def _announce(state, states):
+    if len(states) > 1:
+        print(f"\n👤 Account: {state.name}")
+
+def run(states):
+    """One scheduler pass over already-loaded BotStates (one per account)"""
+    # 0-1. MAINTENANCE: cleanup, then refill any queue that's low (the
+    #      feeds are scraped once for every account)
+    maintain_queues(states)
+
+    ready = []
+    for state in states:
+        _announce(state, states)
+        # 2. CHECK: Is it time to post?
+        if not is_posting_hour(state.allowed_hours):
+            print("⏳ Not a posting hour. Maintenance complete.")
+            continue
+
+        # 3. CHECK: Daily limit
+        if check_daily_limit(state):
+            ready.append(state)
+
+    # 4. ACTION: Post the due tweet (plus a short catch-up burst if
+    #    several slots are overdue), all accounts at once
+    with metrics.span('posting'):
+        if len(ready) == 1:
+            PostingEngine(ready[0]).drain()
+        elif ready:
+            from concurrent.futures import ThreadPoolExecutor
+            with ThreadPoolExecutor(max_workers=len(ready)) as pool:
+                list(pool.map(lambda state: PostingEngine(state).drain(), ready))
+
+def maintain_queues(states):
     # 0. FIRST: Clean up stale/posted data (freshness-based, not date-based)
-    tracker = cleanup_old_data()
-    
+    for state in states:
+        _announce(state, states)
+        with metrics.span('cleanup'):
+            tracker = cleanup_old_data(state)
+        print(f"📊 Daily Stats: {tracker.get('count', 0)}/{state.daily_limit} posts today")
+        print(f"📋 Queue: {len(state.schedule)} scheduled posts")
+
     # 1. MAINTENANCE: Always refill queue if low
-    schedule = load_json(SCHEDULE_FILE)
-    if not isinstance(schedule, list): 
-        schedule = []
-    
-    print(f"📊 Daily Stats: {tracker.get('count', 0)}/{DAILY_LIMIT} posts today")
-    print(f"📋 Queue: {len(schedule)} scheduled posts")
-    
-    if len(schedule) < 5:  # Refill if queue is getting low
-        print("📭 Queue is low! Scraping new opportunities...")
-        new_posts = refill_queue(schedule)
-        if new_posts:
-            schedule.extend(new_posts)
-            save_json(SCHEDULE_FILE, schedule)
-            print(f"✅ Added {len(new_posts)} new posts to queue.")
-    
-    # 2. CHECK: Is it time to post?
-    if not is_posting_hour():
-        print("⏳ Not a posting hour. Maintenance complete.")
+    low = [state for state in states if len(state.schedule) < MIN_QUEUE_SIZE]
+    if not low:
         return
-    
-    # 3. CHECK: Daily limit
-    if not check_daily_limit():
-        return
-    
-    # 4. ACTION: Post Tweet
-    if schedule:
-        # Authenticate only when we actually need to post
-        client = authenticate_twitter()
-        if not client: 
-            return
-    
-        # Find the next unposted item
-        post_to_publish = None
-        post_index = None
-        
-        for i, post in enumerate(schedule):
-            if not post.get('posted', False):
-                post_to_publish = post
-                post_index = i
-                break
-        
-        if post_to_publish:
+    print(f"📭 Queue is low{' for ' + ', '.join(s.name for s in low) if len(states) > 1 else ''}! "
+          "Scraping new opportunities...")
+    with metrics.span('refill'):
+        print("\n🔍 Refilling Queue...")
+        routed = route_opportunities(collect_opportunities(), [state.account for state in low])
+        for state in low:
+            _announce(state, states)
+            new_posts = refill_queue(state.schedule, state.slots, state.near_dups,
+                                     opportunities=routed[state.name], posted=state.posted, now=state.now())
+            metrics.count('queued', len(new_posts))
+            if new_posts:
+                state.enqueue(new_posts)
+                print(f"✅ Added {len(new_posts)} new posts to queue.")
+
+# ============================================================================
+# POSTING ENGINE
+# ============================================================================
+
+class RateLimited(Exception):
+    """X answered 429; `reset` is the epoch when posting may resume"""
+
+    def __init__(self, reset):
+        super().__init__(f"rate limited until {datetime.fromtimestamp(reset, timezone.utc):%H:%M:%S} UTC")
+        self.reset = reset
+
+def _http_status(error):
+    return getattr(getattr(error, 'response', None), 'status_code', None)
+
+def _rate_limit_reset(error, now):
+    """When posting may resume after a 429, from the response's headers.
+
+    X sends the 24-hour limit headers on every response, so a window's
+    reset only counts if that window is exhausted (its *-remaining is 0);
+    otherwise the 15-minute x-rate-limit-reset applies.
+    """
+    headers = getattr(getattr(error, 'response', None), 'headers', None) or {}
+
+    def number(name):
+        try:
+            return float(headers[name])
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    exhausted = [number(f'{prefix}-reset') for prefix in
+                 ('x-rate-limit', 'x-user-limit-24hour', 'x-app-limit-24hour')
+                 if number(f'{prefix}-remaining') == 0]
+    exhausted = [reset for reset in exhausted if reset is not None]
+    if exhausted:
+        return max(exhausted)
+    window = number('x-rate-limit-reset')
+    return window if window is not None else now + RATE_LIMIT_FALLBACK_MINUTES * 60
+
+def _is_transient(error):
+    """5xx from X, or a network-level failure (requests' errors are OSErrors)"""
+    status = _http_status(error)
+    return (status is not None and status >= 500) or (status is None and isinstance(error, OSError))
+
+def _is_duplicate(error):
+    """X refuses a tweet it has already seen — i.e. an earlier attempt landed"""
+    return _http_status(error) == 403 and 'duplicate' in str(error).lower()
+
+def _tweet_id(response):
+    data = getattr(response, 'data', None)
+    if data is None and isinstance(response, dict):
+        data = response.get('data')
+    return data.get('id') if isinstance(data, dict) else None
+
+class PostingEngine:
+    """Posts due tweets through the X API without double-posting.
+
+    - Before create_tweet, the post is written to POSTING_STATE_FILE as
+      'pending' and flushed. If the process dies before the result is
+      recorded, the next BotState load finds the marker and counts the post
+      as sent (BotState.recover_pending) rather than risking a second tweet.
+    - 5xx and network errors are retried with full-jitter exponential
+      backoff; a 403 "duplicate content" means an earlier attempt landed.
+    - A 429 records X's reset time; nothing is posted until it passes.
+    - drain() fills the earliest due slot with the best-scored queued item
+      (BotState.claim_slot) and, when more slots are overdue, keeps going
+      up to MAX_CATCHUP_POSTS (within DAILY_LIMIT).
+
+    `sleep`, `clock` (default: the BotState's) and `rng` are injectable
+    for tests.
+    """
+
+    def __init__(self, state, client=None, sleep=time.sleep, clock=None, rng=random):
+        self.state = state
+        self.client = client
+        self.sleep = sleep
+        self.clock = clock or state.clock
+        self.rng = rng
+
+    # -- bookkeeping -------------------------------------------------------
+
+    def _now_iso(self):
+        return datetime.fromtimestamp(self.clock(), timezone.utc).isoformat()
+
+    def _mark_posted(self, post, tweet_id=None):
+        self.state.posted.add(post['url'], when=self.clock())
+        increment_daily_count(self.state)
+        post['posted'] = True
+        post['posted_at'] = self._now_iso()
+        if tweet_id:
+            post['tweet_id'] = tweet_id
+        self.state.evict(post)
+
+    def _set_pending(self, post):
+        if post is None:
+            self.state.posting.pop('pending', None)
+        else:
+            self.state.posting['pending'] = {'url': post['url'],
+                                             'started_at': self._now_iso()}
+        self.state.mark_dirty('posting')
+
+    def rate_limit_remaining(self):
+        """Seconds until the recorded 429 window ends (0 if not limited)"""
+        reset = self.state.posting.get('rate_limit_reset')
+        return max(0.0, reset - self.clock()) if reset else 0.0
+
+    # -- posting -----------------------------------------------------------
+
+    def _backoff(self, attempt):
+        return self.rng.uniform(0, min(POST_RETRY_MAX_SECONDS, POST_RETRY_BASE_SECONDS * 2 ** attempt))
+
+    def post(self, post):
+        """Tweet one queued post. True if it is (now) on X."""
+        if self.rate_limit_remaining():
+            print(f"🚦 Rate limited for another {self.rate_limit_remaining() / 60:.0f}m — not posting.")
+            return False
+        if self.client is None:
+            self.client = get_client(self.state.account)
+            if not self.client:
+                return False
+
+        nigeria_tz = timezone(timedelta(hours=1))
+        print(f"\n📤 Posting: {post['tweet_text'][:50]}...")
+        print(f"📅 Today's date: {datetime.now(nigeria_tz).strftime('%Y-%m-%d %H:%M:%S')}")
+
+        # Checkpoint the intent before touching the API
+        self._set_pending(post)
+        self.state.flush()
+
+        for attempt in range(POST_MAX_ATTEMPTS):
             try:
-                print(f"\n📤 Posting: {post_to_publish['tweet_text'][:50]}...")
-                print(f"📅 Today's date: {datetime.now(nigeria_tz).strftime('%Y-%m-%d %H:%M:%S')}")
-                
-                response = client.create_tweet(text=post_to_publish['tweet_text'])
-                save_posted_url(post_to_publish['url'])
-                increment_daily_count()
-                
-                # Mark as posted with timestamp
-                schedule[post_index]['posted'] = True
-                schedule[post_index]['posted_at'] = datetime.now(timezone.utc).isoformat()
-                save_json(SCHEDULE_FILE, schedule)
-                
-                # Verify increment worked
-                updated_tracker = load_json(DAILY_TRACKER_FILE)
-                print(f"📊 New daily count: {updated_tracker.get('count', 0)}/{DAILY_LIMIT}")
-                print(f"📎 URL: {post_to_publish['url']}")
-                print("✅ Tweet sent successfully!")
-                
+                response = self.client.create_tweet(text=post['tweet_text'])
             except Exception as e:
+                if _http_status(e) == 429:
+                    reset = _rate_limit_reset(e, self.clock())
+                    self.state.posting['rate_limit_reset'] = reset
+                    self._set_pending(None)
+                    print(f"🚦 {RateLimited(reset)}")
+                    raise RateLimited(reset) from e
+                if _is_duplicate(e):
+                    print("♻️  X already has this tweet (an earlier attempt went through).")
+                    self._mark_posted(post)
+                    self._set_pending(None)
+                    return True
+                if _is_transient(e) and attempt + 1 < POST_MAX_ATTEMPTS:
+                    delay = self._backoff(attempt)
+                    print(f"⚠️  Transient error ({e}); retrying in {delay:.1f}s...")
+                    metrics.count('post_retries')
+                    self.sleep(delay)
+                    continue
                 print(f"❌ Error posting: {e}")
                 # Don't mark as posted if there was an error
-        else:
-            print("📭 No unposted items in queue.")
-            # Clean up all posted items to make room for new ones
-            unposted_posts = [p for p in schedule if not p.get('posted', False)]
-            save_json(SCHEDULE_FILE, unposted_posts)
-            print(f"🧹 Cleaned queue: {len(schedule)} → {len(unposted_posts)} posts")
+                self._set_pending(None)
+                return False
+
+            self._mark_posted(post, tweet_id=_tweet_id(response))
+            self._set_pending(None)
+            metrics.count('tweets_posted')
+            self.state.posting.pop('rate_limit_reset', None)
+            print(f"📊 New daily count: {self.state.tracker.get('count', 0)}/{self.state.daily_limit}")
+            print(f"📎 URL: {post['url']}")
+            print("✅ Tweet sent successfully!")
+            return True
+        return False
+
+    def drain(self, max_posts=MAX_CATCHUP_POSTS, post=None):
+        """Fill the due slot (or `post`'s slot), then any other overdue slots,
+        up to `max_posts` and the remaining DAILY_LIMIT. Each slot gets the
+        best-scored unposted item. Returns how many were sent."""
+        state = self.state
+        if not state.schedule:
+            return 0
+        budget = min(max_posts, state.daily_limit - state.tracker.get('count', 0))
+        sent = 0
+        while sent < budget:
+            target = post if sent == 0 and post is not None else state.next_due_post()
+            if target is None:
+                break
+            target = state.claim_slot(target)
+            if sent:
+                self.sleep(CATCHUP_SPACING_SECONDS * self.rng.uniform(0.75, 1.25))
+                print(f"⏩ Catching up on overdue slot {target.get('scheduled_time')}")
+            try:
+                if not self.post(target):
+                    break
+            except RateLimited:
+                break
+            sent += 1
+
+        if sent == 0 and post is None and state.next_due_post() is None:
+            if any(not p.get('posted', False) for p in state.schedule):
+                print("⏳ No queued post is due yet.")
+            else:
+                print("📭 No unposted items in queue.")
+                # Clean up all posted items to make room for new ones
+                unposted_posts = [p for p in state.schedule if not p.get('posted', False)]
+                print(f"🧹 Cleaned queue: {len(state.schedule)} → {len(unposted_posts)} posts")
+                state.set_schedule(unposted_posts)
+        return sent
+
+# ============================================================================
+# DAEMON MODE
+# ============================================================================
+
+class TimerQueue:
+    """Min-heap of timers, each (due epoch, sequence, label, callback).
+
+    `clock` returns the current epoch seconds; pass a fake one in tests.
+    """
+
+    def __init__(self, clock=time.time):
+        self.clock = clock
+        self._heap = []
+        self._seq = itertools.count()
+
+    def __len__(self):
+        return len(self._heap)
+
+    def schedule(self, when, label, callback):
+        heapq.heappush(self._heap, (when, next(self._seq), label, callback))
+
+    def next_due(self):
+        """Epoch of the earliest timer, or None if nothing is scheduled"""
+        return self._heap[0][0] if self._heap else None
+
+    def run_due(self):
+        """Fire every timer that is due now, earliest first. Returns how many fired."""
+        fired = 0
+        while self._heap and self._heap[0][0] <= self.clock():
+            _, _, label, callback = heapq.heappop(self._heap)
+            try:
+                callback()
+            except Exception as e:
+                print(f"❌ Timer '{label}' failed: {e}")
+            fired += 1
+        return fired
+
+def run_daemon(clock=time.time, stop_event=None, wait=None):
+    """Long-running mode: state and the X client stay in memory, every queued
+    post fires at its own `scheduled_time`, and refills run every
+    REFILL_INTERVAL_MINUTES.
+
+    `clock` / `wait(timeout)` are injectable for tests: `clock` drives the
+    timers and every BotState (expiry, slots, daily count, posting); `wait`
+    returns True once the daemon should stop (default: stop_event.wait). SIGINT/SIGTERM
+    stop the loop, and state is flushed on the way out. Every account in
+    ACCOUNTS is served from the same timer queue.
+    """
+    stop_event = stop_event or threading.Event()
+    wait = wait or stop_event.wait
+    states = [BotState(account, clock=clock) for account in iter_accounts()]
+    timers = TimerQueue(clock)
+    timed_urls = set()  # (account, url) of posts that already have a timer
+
+    def fire_post(state, post):
+        timed_urls.discard((state.name, post['url']))
+        # The timer is only a wake-up: claim_slot() may have moved this post
+        # to another slot (or it was posted or cleaned up since), so post
+        # whatever is actually due now
+        post = state.next_due_post()
+        if post is None:
+            return
+        client = check_daily_limit(state) and get_client(state.account)
+        if client:
+            with metrics.span('posting'):
+                PostingEngine(state, client).drain(max_posts=1, post=post)
+        with metrics.span('flush'):
+            state.flush()
+        metrics.emit('daemon-post')
+
+    def schedule_posts():
+        for state in states:
+            for post in state.schedule:
+                key = (state.name, post['url'])
+                if post.get('posted', False) or key in timed_urls:
+                    continue
+                when = parse_iso_epoch(post.get('scheduled_time'), default=clock())
+                timers.schedule(when, f"post {post['url']} ({state.name})",
+                                lambda s=state, p=post: fire_post(s, p))
+                timed_urls.add(key)
+
+    def refill():
+        # Book the next refill first so a failed one (network, disk) can't
+        # stop the daemon from ever refilling again
+        timers.schedule(clock() + REFILL_INTERVAL_MINUTES * 60, 'refill', refill)
+        maintain_queues(states)
+        schedule_posts()
+        with metrics.span('flush'):
+            for state in states:
+                state.flush()
+        metrics.emit('daemon-refill')
+
+    def request_stop(signum, frame):
+        print(f"\n🛑 Received signal {signum}, shutting down...")
+        stop_event.set()
+
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGINT, request_stop)
+        signal.signal(signal.SIGTERM, request_stop)
+
+    print(f"👹 Daemon started (refill every {REFILL_INTERVAL_MINUTES}m)")
+    timers.schedule(clock(), 'refill', refill)
+    try:
+        while not stop_event.is_set():
+            timers.run_due()
+            due = timers.next_due()
+            delay = DAEMON_MAX_SLEEP_SECONDS if due is None else max(0.0, due - clock())
+            if wait(min(delay, DAEMON_MAX_SLEEP_SECONDS)):
+                break
+    finally:
+        flushed = sum(state.flush() for state in states)
+        print(f"💾 Daemon stopped ({flushed} state file(s) flushed).")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="X auto poster bot")
+    parser.add_argument('--daemon', action='store_true',
+                        help="run continuously and post at each slot's scheduled_time instead of once per cron tick")
+    parser.add_argument('--full', action='store_true',
+                        help="skip the fast no-op check and always run cleanup/refill/posting")
+    parser.add_argument('--profile', action='store_true',
+                        help=f"profile the run with cProfile and save the stats to {PROFILE_FILE}")
+    args = parser.parse_args()
+    entry = (lambda: run_daemon()) if args.daemon else (lambda: main(full=args.full))
+    if args.profile:
+        import cProfile
+        import pstats
+        profiler = cProfile.Profile()
+        try:
+            profiler.runcall(entry)
+        finally:
+            profiler.dump_stats(PROFILE_FILE)
+            print(f"\n🔬 Profile saved to {PROFILE_FILE} (top functions by cumulative time):")
+            pstats.Stats(profiler).sort_stats('cumulative').print_stats(15)
+    else:
+        entry()
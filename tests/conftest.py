@@ -0,0 +1,22 @@
+import os
+import sys
+
+import pytest
+
+# bot.py and benchmark.py (whose feed stub and fake clients the tests share)
+# live at the repository root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import bot  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def scratch_state(tmp_path, monkeypatch):
+    """Every test starts in an empty cwd with no cached per-run singletons"""
+    monkeypatch.chdir(tmp_path)
+    caches = (bot._posted_stores, bot._state_dbs, bot._clients)
+    for cache in caches:
+        cache.clear()
+    yield tmp_path
+    for cache in caches:
+        cache.clear()
@@ -0,0 +1,15 @@
+import json
+from datetime import datetime, timedelta, timezone
+
+import bot
+
+
+def test_fast_path_uses_the_given_time_for_the_day():
+    account = bot.iter_accounts()[0]
+    now = datetime(2026, 3, 1, account['allowed_hours_utc'][0], tzinfo=timezone.utc)
+    with open(bot.STATE_HEADER_FILE, 'w') as f:
+        json.dump({'date': bot.nigeria_today_str(now), 'queue': bot.MIN_QUEUE_SIZE, 'count': 0,
+                   'next_due': (now + timedelta(hours=1)).timestamp()}, f)
+
+    assert bot.fast_path_check(now=now, account=account) == "no queued post is due yet"
+    assert bot.fast_path_check(now=now + timedelta(days=1), account=account) is None
@@ -0,0 +1,79 @@
+import time
+
+import pytest
+
+import bot
+from benchmark import FeedStub, scaled_feed, synthetic_fixtures
+
+SLOWEST = 0.5
+DELAYS = [SLOWEST * f for f in (0.2, 0.5, 0.8, 1.0)]
+SLACK = 0.4  # thread start-up, parsing and the local round trips
+
+
+@pytest.fixture(scope='module')
+def payload():
+    return scaled_feed(next(iter(synthetic_fixtures(20).values())), 20, 'fetch')
+
+
+@pytest.fixture
+def stubs():
+    started = []
+
+    def start(payloads, delays=None, trickle=None):
+        started.append(FeedStub(payloads, delays, trickle))
+        return started[-1]
+
+    yield start
+    for stub in started:
+        stub.close()
+
+
+def fetch(urls, **kwargs):
+    report = {}
+    started = time.perf_counter()
+    bot.fetch_feeds(urls, use_cache=False, report=report, **kwargs)
+    return time.perf_counter() - started, report
+
+
+def test_wall_time_is_the_slowest_feed_not_the_sum(stubs, payload):
+    urls = [f"{stubs({'/feed': payload}, {'/feed': delay}).base}/feed" for delay in DELAYS]
+    elapsed, report = fetch(urls)
+    assert SLOWEST <= elapsed < SLOWEST + SLACK < sum(DELAYS)
+    assert all(r['status'] == 'changed' for r in report.values())
+
+
+def test_a_feed_slower_than_the_deadline_is_cut_off(stubs, payload):
+    deadline = SLOWEST * 1.5
+    urls = [f"{stubs({'/feed': payload}, {'/feed': delay}).base}/feed" for delay in DELAYS + [deadline * 2]]
+    elapsed, report = fetch(urls, deadline=deadline)
+    assert elapsed < deadline + SLACK
+    assert [report[url]['status'] for url in urls] == ['changed'] * len(DELAYS) + ['failed']
+
+
+def test_per_host_concurrency_is_respected(stubs, payload):
+    count = bot.PER_HOST_CONCURRENCY * 4
+    delay = SLOWEST / 2
+    stub = stubs({f"/feed{i}": payload for i in range(count)}, {f"/feed{i}": delay for i in range(count)})
+    elapsed, report = fetch([f"{stub.base}/feed{i}" for i in range(count)])
+    waves = count / bot.PER_HOST_CONCURRENCY
+    assert stub.peak == bot.PER_HOST_CONCURRENCY
+    assert waves * delay <= elapsed < waves * delay + SLACK
+    assert all(r['status'] == 'changed' for r in report.values())
+
+
+def test_a_slow_malformed_feed_stops_reading_at_the_deadline(stubs):
+    # Unescaped '&' fails the streaming parser on the first chunk; the rest
+    # trickles in for far longer than the deadline
+    body = b'<rss><channel><item><title>R&D Officer</title>' + b'x' * (40 * bot.FEED_CHUNK_BYTES)
+    stub = stubs({'/feed': body}, trickle={'/feed': 0.3})
+    deadline = 1.0
+    elapsed, report = fetch([f"{stub.base}/feed"], deadline=deadline)
+    assert elapsed < deadline + SLACK
+    assert report[f"{stub.base}/feed"]['status'] == 'failed'
+
+    # The worker gave up too instead of reading the whole body in the background
+    started = time.perf_counter()
+    while stub.active and time.perf_counter() - started < 5:
+        time.sleep(0.05)
+    assert not stub.active
+    assert time.perf_counter() - started < 1.5
@@ -0,0 +1,47 @@
+import json
+import os
+import time
+
+import bot
+
+
+def test_saves_append_only_the_new_signatures():
+    index = bot.NearDupIndex()
+    index.add(0x1234)
+    index.save()
+    inode, size = os.stat(bot.NEAR_DUP_FILE).st_ino, os.path.getsize(bot.NEAR_DUP_FILE)
+
+    index = bot.NearDupIndex()
+    assert not index.dirty
+    index.add(0xbeef)
+    index.save()
+    with open(bot.NEAR_DUP_FILE) as f:
+        lines = f.readlines()
+    assert os.stat(bot.NEAR_DUP_FILE).st_ino == inode
+    assert len(lines) == 2 and os.path.getsize(bot.NEAR_DUP_FILE) > size
+    assert set(bot.NearDupIndex().signatures) == {0x1234, 0xbeef}
+
+
+def test_rewrites_once_expired_lines_outnumber_live_ones():
+    expired = time.time() - (bot.NEAR_DUP_RETENTION_DAYS + 1) * 86400
+    with open(bot.NEAR_DUP_FILE, 'w') as f:
+        for sig in range(5):
+            f.write(json.dumps({'sig': format(sig, '016x'), 'at': expired}) + '\n')
+        f.write(json.dumps({'sig': format(0xbeef, '016x'), 'at': time.time()}) + '\n')
+
+    index = bot.NearDupIndex()
+    assert set(index.signatures) == {0xbeef} and index.dirty
+    index.save()
+    with open(bot.NEAR_DUP_FILE) as f:
+        assert len(f.readlines()) == 1
+
+
+def test_migrates_the_legacy_map():
+    with open(bot.NEAR_DUP_LEGACY_FILE, 'w') as f:
+        json.dump({format(0xbeef, '016x'): time.time()}, f)
+
+    index = bot.NearDupIndex(legacy_path=bot.NEAR_DUP_LEGACY_FILE)
+    assert index.find(0xbeef) == 0xbeef and index.dirty
+    index.save()
+    assert not os.path.exists(bot.NEAR_DUP_LEGACY_FILE)
+    assert set(bot.NearDupIndex().signatures) == {0xbeef}
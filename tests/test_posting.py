@@ -0,0 +1,174 @@
+import contextlib
+import types
+from datetime import datetime, timezone
+
+import pytest
+
+import bot
+from benchmark import FakeClient
+
+START = 1_800_000_000.0
+POSTS = [f"https://example.com/p/{i}" for i in range(2)]
+
+
+class FakeAPIError(Exception):
+    """Shaped like tweepy's HTTPException: .response has the status and headers"""
+
+    def __init__(self, status, message='', headers=None):
+        super().__init__(f"{status} {message}".strip())
+        self.response = types.SimpleNamespace(status_code=status, headers=headers or {})
+
+
+class Crash(BaseException):
+    """The process dying mid-call; nothing in bot.py may catch it"""
+
+
+class ScriptedClient(FakeClient):
+    """FakeClient whose create_tweet answers from a script: an exception in
+    the script is raised, anything else is a successful tweet"""
+
+    def __init__(self, *script):
+        super().__init__()
+        self.script = list(script)
+        self.calls = []
+
+    def create_tweet(self, text):
+        self.calls.append(text)
+        outcome = self.script.pop(0) if self.script else None
+        if isinstance(outcome, BaseException):
+            raise outcome
+        return super().create_tweet(text)
+
+
+def load(clock=None):
+    clock = clock or [START]
+    return bot.BotState(clock=lambda: clock[0])
+
+
+def setup(*script, clock=None):
+    """A state with two overdue posts (p/0 scores best), and an engine on `script`"""
+    state = load(clock)
+    due = datetime.fromtimestamp(START - 3600, timezone.utc).isoformat()
+    state.set_schedule([{'tweet_text': f"🔥 Job {i}\n\n🔗 {url}", 'url': url, 'type': 'job',
+                         'score': 50.0 - i, 'posted': False, 'scheduled_time': due,
+                         'added_at': due, 'added_epoch': START - 3600} for i, url in enumerate(POSTS)])
+    sleeps = []
+    client = ScriptedClient(*script)
+    return state, bot.PostingEngine(state, client, sleep=sleeps.append), client, sleeps
+
+
+def is_posted(state, url=POSTS[0]):
+    return url in state.posted and not any(p['url'] == url for p in state.schedule)
+
+
+def test_5xx_is_retried_with_bounded_backoff():
+    state, engine, client, sleeps = setup(FakeAPIError(503), FakeAPIError(502))
+    assert engine.drain(max_posts=1) == 1
+    assert len(client.calls) == 3 and len(client.tweets) == 1
+    assert len(sleeps) == 2 and all(0 <= s <= bot.POST_RETRY_MAX_SECONDS for s in sleeps)
+    assert is_posted(state)
+    assert state.tracker['count'] == 1
+    assert 'pending' not in state.posting
+
+
+def test_network_errors_are_retried():
+    state, engine, client, sleeps = setup(ConnectionResetError("connection reset"))
+    assert engine.drain(max_posts=1) == 1
+    assert len(client.calls) == 2
+
+
+def test_5xx_gives_up_after_max_attempts():
+    state, engine, client, sleeps = setup(*[FakeAPIError(500)] * bot.POST_MAX_ATTEMPTS)
+    assert engine.drain(max_posts=1) == 0
+    assert len(client.calls) == bot.POST_MAX_ATTEMPTS
+    assert not is_posted(state)
+    assert not state.tracker.get('count')
+    assert 'pending' not in state.posting
+
+
+def test_429_holds_posting_until_the_reset_across_runs():
+    clock = [START]
+    reset = int(START + 600)
+    state, engine, client, sleeps = setup(FakeAPIError(429, headers={'x-rate-limit-reset': str(reset)}),
+                                          clock=clock)
+    assert engine.drain() == 0
+    assert state.posting['rate_limit_reset'] == reset
+    assert not sleeps
+    state.flush()
+
+    state = load(clock)
+    client = ScriptedClient()
+    engine = bot.PostingEngine(state, client)
+    assert engine.drain() == 0
+    assert not client.calls
+
+    clock[0] = reset + 1
+    assert engine.drain(max_posts=1) == 1
+    assert 'rate_limit_reset' not in state.posting
+
+
+@pytest.mark.parametrize('headers, expected', [
+    # X sends the 24-hour headers on every response; only an exhausted
+    # window's reset may hold posting
+    ({'x-rate-limit-remaining': '0', 'x-rate-limit-reset': str(int(START + 600)),
+      'x-user-limit-24hour-remaining': '14', 'x-user-limit-24hour-reset': str(int(START + 22 * 3600)),
+      'x-app-limit-24hour-remaining': '1200', 'x-app-limit-24hour-reset': str(int(START + 22 * 3600))},
+     int(START + 600)),
+    ({'x-rate-limit-remaining': '5', 'x-rate-limit-reset': str(int(START + 600)),
+      'x-user-limit-24hour-remaining': '0', 'x-user-limit-24hour-reset': str(int(START + 22 * 3600))},
+     int(START + 22 * 3600)),
+    ({'x-rate-limit-reset': str(int(START + 600))}, int(START + 600)),
+    ({}, START + bot.RATE_LIMIT_FALLBACK_MINUTES * 60),
+], ids=['15-minute window', 'daily quota spent', 'reset only', 'no headers'])
+def test_429_reset_comes_from_the_exhausted_window(headers, expected):
+    state, engine, client, sleeps = setup(FakeAPIError(429, headers=headers))
+    engine.drain()
+    assert state.posting['rate_limit_reset'] == expected
+
+
+def test_403_duplicate_counts_as_posted():
+    state, engine, client, sleeps = setup(
+        FakeAPIError(403, "You are not allowed to create a Tweet with duplicate content."))
+    assert engine.drain(max_posts=1) == 1
+    assert len(client.calls) == 1
+    assert is_posted(state)
+    assert state.tracker['count'] == 1
+
+
+def test_other_403s_are_neither_retried_nor_posted():
+    state, engine, client, sleeps = setup(FakeAPIError(403, "Forbidden"))
+    assert engine.drain(max_posts=1) == 0
+    assert len(client.calls) == 1
+    assert not sleeps
+    assert not is_posted(state)
+
+
+def test_crash_after_the_pending_flush_is_never_retweeted():
+    state, engine, client, sleeps = setup(Crash())
+    with pytest.raises(Crash):
+        engine.drain(max_posts=1)
+    assert state.posting['pending']['url'] == POSTS[0]  # flushed before create_tweet
+
+    # The next run starts from what reached disk
+    state = load()
+    assert is_posted(state, POSTS[0])
+    assert 'pending' not in state.posting
+    assert state.tracker['count'] == 1
+
+    client = ScriptedClient()
+    bot.PostingEngine(state, client).drain()
+    assert client.calls
+    assert not any(POSTS[0] in text for text in client.calls)
+
+
+def test_crashed_post_that_expired_still_lands_in_the_posted_store():
+    state, engine, client, sleeps = setup(Crash())
+    with contextlib.suppress(Crash):
+        engine.drain(max_posts=1)
+    state.set_schedule([p for p in state.schedule if p['url'] != POSTS[0]])
+    state.flush()
+
+    state = load()
+    assert POSTS[0] in state.posted
+    assert 'pending' not in state.posting
+    assert not bot.is_unposted(POSTS[0], [state.posted])
@@ -0,0 +1,74 @@
+import random
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+import bot
+
+DAYS = 30
+HOURS = sorted(bot.ALLOWED_HOURS_UTC)
+
+
+@pytest.fixture
+def rng():
+    return random.Random(7)
+
+
+@pytest.fixture
+def now(rng):
+    return datetime(2026, 1, 1, tzinfo=timezone.utc) + timedelta(minutes=rng.randrange(24 * 60))
+
+
+@pytest.fixture
+def existing(rng, now):
+    """A queue left by earlier runs: random occupied slots, some posted"""
+    queue = []
+    for i in range(1000):
+        slot = (now + timedelta(days=rng.randrange(DAYS))).replace(
+            hour=rng.choice(HOURS), minute=0, second=0, microsecond=0)
+        queue.append({'url': f"https://example.com/{i}", 'posted': rng.random() < 0.2,
+                      'scheduled_time': slot.isoformat(), 'score': round(rng.uniform(0, 100), 2)})
+    return queue
+
+
+def test_assigned_slots(existing, now):
+    occupied = {bot.parse_iso_epoch(p['scheduled_time']) for p in existing if not p['posted']}
+    allocator = bot.SlotAllocator(existing, now=now, horizon_days=DAYS)
+    assigned = [allocator.assign(now=now) for _ in range(2000)]
+    epochs = [slot.timestamp() for slot in assigned]
+
+    assert len(set(epochs)) == len(epochs)
+    assert all(e > now.timestamp() for e in epochs)
+    assert all(slot.hour in HOURS and slot.minute == 0 for slot in assigned)
+    assert not occupied.intersection(epochs)
+    assert epochs == sorted(epochs)
+
+
+def test_next_due_post_matches_brute_force(existing, now, rng):
+    state = bot.BotState()
+    state.set_schedule(existing)
+    for _ in range(200):
+        probe = now + timedelta(days=rng.uniform(-1, DAYS))
+        expected = min((bot.parse_iso_epoch(p['scheduled_time']) for p in existing
+                        if not p['posted'] and bot.parse_iso_epoch(p['scheduled_time']) <= probe.timestamp()),
+                       default=None)
+        due = state.next_due_post(now=probe)
+        assert (bot.parse_iso_epoch(due['scheduled_time']) if due else None) == expected
+        if due and rng.random() < 0.5:
+            due['posted'] = True
+
+
+def test_claim_slot_gives_the_due_slot_to_the_best_scored_item(existing, now):
+    state = bot.BotState()
+    state.set_schedule(existing)
+    for _ in range(200):
+        slot = state.next_due_post(now=now + timedelta(days=DAYS + 1))
+        if slot is None:
+            break
+        expected_time = min(bot.parse_iso_epoch(p['scheduled_time']) for p in state.schedule if not p['posted'])
+        best = state.claim_slot(slot)
+        assert best['score'] == max(p['score'] for p in state.schedule if not p['posted'])
+        # Swapped slots still come due in time order
+        assert bot.parse_iso_epoch(best['scheduled_time']) == expected_time
+        best['posted'] = True
+        state.evict(best)
@@ -0,0 +1,29 @@
+import pytest
+
+import bot
+from benchmark import tweet_corpus
+
+
+@pytest.fixture(scope='module')
+def rendered():
+    items = tweet_corpus(1000, seed=11)
+    return items, [bot.format_rich_tweet(item) for item in items]
+
+
+def test_every_tweet_fits_the_weighted_limit(rendered):
+    _, tweets = rendered
+    assert max(bot.tweet_weight(t) for t in tweets) <= bot.TWEET_MAX_WEIGHT
+
+
+def test_every_tweet_keeps_its_link(rendered):
+    items, tweets = rendered
+    assert all(item['url'] in tweet for item, tweet in zip(items, tweets))
+
+
+def test_weights_agree_with_x(rendered):
+    twitter_text = pytest.importorskip('twitter_text')
+    _, tweets = rendered
+    for tweet in tweets:
+        reference = twitter_text.parse_tweet(tweet).weightedLength
+        assert reference <= bot.TWEET_MAX_WEIGHT
+        assert bot.tweet_weight(tweet) >= reference  # never undercounts